@@ -0,0 +1,85 @@
+"""Re-runs LLM categorization over stored samples, e.g. after editing CATEGORY_COLORS.
+
+Categories are rewritten in place in the day logs. Finished days are recorded
+in a checkpoint file, so an interrupted backfill picks up where it left off.
+Today is left alone: the tracker is still appending to it and holds its
+samples in memory.
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI
+import storage
+from chart import CATEGORY_NAMES
+from check import API_BASE_URL, API_KEY_FILE, categorize, load_api_key
+
+log = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Blocks until the caller may make its call."""
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def backfill(data_dir: str, client: OpenAI, workers: int, rate: float, checkpoint_path: str):
+    """Recategorizes every finished day not yet in the checkpoint, one day at a time."""
+    done = set()
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            done = set(f.read().split())
+    limiter = RateLimiter(rate)
+    fail_code = CATEGORY_NAMES.index("Fail")
+
+    def recategorize(description):
+        limiter.wait()
+        return CATEGORY_NAMES.index(categorize(client, description))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, open(checkpoint_path, "a") as checkpoint:
+        for day in storage.list_days(data_dir):
+            if day.isoformat() in done or day >= date.today():
+                continue
+            samples = storage.read_day(data_dir, day)
+            # Failed samples have no real description; repeated screens share one
+            descriptions = list(dict.fromkeys(s[3] for s in samples if s[1] != fail_code))
+            new_codes = dict(zip(descriptions, pool.map(recategorize, descriptions)))
+            changes = {
+                i: new_codes[description]
+                for i, (_, code, _, description) in enumerate(samples)
+                if code != fail_code and new_codes[description] != code
+            }
+            storage.rewrite_categories(data_dir, day, changes)
+            checkpoint.write(day.isoformat() + "\n")
+            checkpoint.flush()
+            log.info("%s: %d samples, %d LLM calls, %d recategorized", day, len(samples), len(descriptions), len(changes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recategorize stored samples with the current CATEGORY_COLORS.")
+    parser.add_argument("data_dir", nargs="?", default="data", help="Data directory to backfill.")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent LLM requests.")
+    parser.add_argument("--rate", type=float, default=5.0, help="Maximum LLM requests per second.")
+    parser.add_argument("--base-url", default=API_BASE_URL, help="OpenAI-compatible endpoint, e.g. a local stub.")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: backfill.checkpoint in the data directory). Delete it to start over.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    client = OpenAI(base_url=args.base_url, api_key=load_api_key(API_KEY_FILE))
+    checkpoint_path = args.checkpoint or os.path.join(args.data_dir, "backfill.checkpoint")
+    backfill(args.data_dir, client, args.workers, args.rate, checkpoint_path)
@@ -0,0 +1,119 @@
+"""Benchmarks for the ingestion, merging and rendering paths on synthetic data.
+
+Writes wall time and peak traced memory for each stage and size as JSON.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+import storage
+from chart import CATEGORY_COLORS, CATEGORY_NAMES, ChartRenderer, chart_window, merge_segments, rasterize, read_data
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+WIDTHS = (1000, 1920, 3840)
+DESCRIPTIONS = [
+    "Writing Python code in a terminal editor.",
+    "Watching a YouTube video about woodworking.",
+    "Reading an article in The Economist.",
+    "Scrolling through Hacker News comments.",
+]
+
+
+def generate(data_dir: str, days: list[date], samples_per_day: int, churn: float, gap_probability: float, gap_seconds: int):
+    """Writes a day log per day with samples spread evenly over the chart window.
+
+    churn is the chance that a sample switches category; with gap_probability a
+    sample is followed by gap_seconds of nothing (tracker off, laptop closed).
+    Gaps drop the samples they cover, so every sample stays inside the window.
+    """
+    trackable = [code for code, name in enumerate(CATEGORY_NAMES) if name not in ("Unknown", "Fail")]
+    for day in days:
+        chart_start, chart_end = chart_window(day)
+        step = (chart_end - chart_start) / samples_per_day
+        log_path, desc_path = storage.day_paths(data_dir, day)
+        records = bytearray()
+        blob = bytearray()
+        code = random.choice(trackable)
+        gap_end = chart_start
+        for i in range(samples_per_day):
+            timestamp = int(chart_start + i * step)
+            if timestamp < gap_end:
+                continue
+            if random.random() < churn:
+                code = random.choice(trackable)
+            if random.random() < gap_probability:
+                gap_end = timestamp + gap_seconds
+            description = random.choice(DESCRIPTIONS).encode()
+            records += storage.RECORD.pack(timestamp, code, 100, len(blob), len(description))
+            blob += description
+        with open(log_path, "wb") as f:
+            f.write(records)
+        with open(desc_path, "wb") as f:
+            f.write(blob)
+
+
+def measure(function, *args):
+    """Runs function twice: once for wall time, once under tracemalloc for peak memory."""
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"seconds": seconds, "peak_bytes": peak}
+
+
+def run(sizes, widths, days, churn, gap_probability, gap_seconds) -> list[dict]:
+    """Benchmarks every stage for every size (and every width for the render stages).
+
+    Ingestion reads all days; merging and rendering work on the last one.
+    """
+    results = []
+    all_days = [date.today() - timedelta(days=n) for n in range(days, 0, -1)]
+    day = all_days[-1]
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            generate(data_dir, all_days, size, churn, gap_probability, gap_seconds)
+            chart_start, chart_end = chart_window(day)
+
+            timelines, stats = measure(lambda: [read_data(data_dir, d) for d in all_days])
+            results.append({"stage": "read_data", "points": size, "samples": sum(map(len, timelines)), "days": days, **stats})
+            # Only the samples inside the chart's time range, like ChartRenderer.render
+            timeline = timelines[-1].between(chart_start, chart_end)
+
+            segments, stats = measure(merge_segments, timeline.times, timeline.codes, timeline.validities,
+                                      chart_start, chart_end, CATEGORY_NAMES.index("Unknown"))
+            results.append({"stage": "merge_segments", "points": size, "samples": len(timeline), "segments": len(segments), **stats})
+
+            for width in widths:
+                _, stats = measure(rasterize, segments, chart_start, (chart_end - chart_start) / width, width)
+                results.append({"stage": "rasterize", "points": size, "width": width, **stats})
+
+                output_path = os.path.join(data_dir, "chart.png")
+                # A fresh renderer each time, so this is the full (uncached) render
+                _, stats = measure(lambda: ChartRenderer(output_path, width, 44, CATEGORY_COLORS).render(timeline, day, True))
+                results.append({"stage": "render", "points": size, "width": width, **stats})
+            print(f"{size} points done")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark read_data, merging and rendering on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Samples per day to benchmark.")
+    parser.add_argument("--widths", type=int, nargs="+", default=WIDTHS, help="Chart widths to render at.")
+    parser.add_argument("--days", type=int, default=1, help="Days of data to generate and ingest.")
+    parser.add_argument("--churn", type=float, default=0.1, help="Chance that a sample switches category.")
+    parser.add_argument("--gap-probability", type=float, default=0.001, help="Chance of a gap after a sample.")
+    parser.add_argument("--gap-seconds", type=int, default=600, help="Length of each gap.")
+    parser.add_argument("--output", default="bench.json", help="Where to write the JSON results.")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.widths, args.days, args.churn, args.gap_probability, args.gap_seconds)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
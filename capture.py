@@ -0,0 +1,60 @@
+"""Screenshot backends. Each one returns an encoded JPEG, entirely in memory.
+
+Backends take the output (monitor) to capture; None means the whole screen.
+"""
+import io
+import json
+import logging
+import random
+import subprocess
+from PIL import Image, ImageDraw
+
+log = logging.getLogger(__name__)
+
+
+def grim(output: str | None = None) -> bytes:
+    """Captures the screen on Wayland, streaming grim's output straight from its stdout."""
+    grim_command = ["grim", "-t", "jpeg", "-s", "0.5"] + (["-o", output] if output else []) + ["-"]
+    log.debug("Running command: %s", " ".join(grim_command))
+    return subprocess.run(grim_command, check=True, capture_output=True).stdout
+    # Removed error handling for grim
+
+
+def grim_window(output: str | None = None) -> bytes:
+    """Captures only the focused window on sway: less to upload, and nothing from the other windows.
+
+    The focused window is the same whichever output is asked for.
+    """
+    tree = json.loads(subprocess.run(["swaymsg", "-t", "get_tree"], check=True, capture_output=True).stdout)
+    nodes = [tree]
+    while nodes:
+        node = nodes.pop()
+        if node["focused"]:
+            break
+        nodes.extend(node["nodes"] + node["floating_nodes"])
+    else:
+        return grim() # Nothing focused, e.g. while a layer shell surface has the keyboard
+    rect = node["rect"]
+    grim_command = ["grim", "-t", "jpeg", "-s", "0.5", "-g", f"{rect['x']},{rect['y']} {rect['width']}x{rect['height']}", "-"]
+    log.debug("Running command: %s", " ".join(grim_command))
+    return subprocess.run(grim_command, check=True, capture_output=True).stdout
+
+
+def synthetic(output: str | None = None) -> bytes:
+    """Generates a random screen-sized image, for running the tracker without a display."""
+    image = Image.new('RGB', (960, 540), (30, 30, 30))
+    draw = ImageDraw.Draw(image)
+    for _ in range(8):
+        x, y = random.randrange(960), random.randrange(540)
+        color = tuple(random.randrange(256) for _ in range(3))
+        draw.rectangle([(x, y), (x + random.randrange(400), y + random.randrange(300))], fill=color)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+BACKENDS = {
+    "grim": grim,
+    "grim-window": grim_window,
+    "synthetic": synthetic,
+}
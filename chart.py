@@ -1,4 +1,9 @@
+import logging
 import os
+import metrics
+import storage
+from array import array
+from bisect import bisect_left
 from datetime import datetime, time, date, timedelta, timezone
 from PIL import Image, ImageDraw, ImageFont # Import ImageFont
 
@@ -15,36 +20,334 @@ CATEGORY_COLORS = {
     # Backend failed
     "Fail":                     ( (0, 255, 0), "N/A" ),
 }
-MAX_VALIDITY_SECONDS = 100
-
-def read_data(data_dir: str, target_date: date) -> list[tuple[datetime, str]]:
-    """Reads data files for the target date and returns sorted list of (timestamp, category)."""
-    data_points = []
-    target_date_str = target_date.strftime("%Y%m%d")
-
-    for filename in os.listdir(data_dir):
-        if filename.startswith(target_date_str) and filename.endswith(".txt"):
-            filepath = os.path.join(data_dir, filename)
-            # Extract timestamp from filename
-            timestamp_str = filename.split('.')[0]
-            dt_obj = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-            # Make datetime timezone-aware (assuming local time)
-            dt_obj = dt_obj.replace(tzinfo=datetime.now().astimezone().tzinfo)
-
-            with open(filepath, 'r') as f:
-                category = f.readline().strip()
-                if category: # Ensure category is not empty
-                    data_points.append((dt_obj, category))
-                # else: # Removed warning for empty category
-                #     print(f"Warning: Empty category in file {filename}")
-
-    # Sort by timestamp
-    data_points.sort(key=lambda x: x[0])
-    return data_points
+CATEGORY_NAMES = list(CATEGORY_COLORS) # Index = category code in the day logs
+VALIDITY_SLACK_SECONDS = 70 # A sample stays valid this long past the next scheduled capture
+CHART_START_HOUR = 7 # The chart spans 7 AM to midnight
+
+log = logging.getLogger(__name__)
+
+class Timeline:
+    """Samples as parallel arrays: epoch seconds, category codes (indices into CATEGORY_NAMES) and validity seconds.
+
+    No per-sample Python objects, so weeks of history fit in a few MB.
+    """
+
+    def __init__(self, times=(), codes=(), validities=()):
+        self.times = array('i', times)
+        self.codes = array('B', codes)
+        self.validities = array('H', validities)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def append(self, timestamp: int, code: int, validity: int):
+        """Appends one sample, which must come after the samples already held."""
+        self.times.append(timestamp)
+        self.codes.append(code)
+        self.validities.append(validity)
+
+    def extend(self, records: list[tuple[int, int, int, int, int]]):
+        """Appends day log records, which must come after the samples already held."""
+        self.times.extend(record[0] for record in records)
+        self.codes.extend(record[1] for record in records)
+        self.validities.extend(record[2] for record in records)
+
+    def between(self, start: int, end: int) -> "Timeline":
+        """Returns the samples with start <= timestamp < end."""
+        i = bisect_left(self.times, start)
+        j = bisect_left(self.times, end)
+        return Timeline(self.times[i:j], self.codes[i:j], self.validities[i:j])
+
+
+def read_data(data_dir: str, target_date: date) -> Timeline:
+    """Reads the day log for the target date into a Timeline."""
+    records, _ = storage.read_records(data_dir, target_date)
+    timeline = Timeline()
+    timeline.extend(records)
+    return timeline
+
+
+class DayReader:
+    """Follows one day's log so each cycle only reads new records."""
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.date = None
+        self.timeline = Timeline()
+        self.offset = 0 # Watermark: bytes of today's log already ingested
+
+    def for_date(self, target_date: date) -> Timeline:
+        """Returns the timeline for target_date, ingesting only records appended since the last call."""
+        if target_date != self.date:
+            self.date = target_date
+            self.timeline = Timeline()
+            self.offset = 0
+        records, self.offset = storage.read_records(self.data_dir, target_date, self.offset)
+        # Records are appended in time order, so extending keeps the timeline sorted
+        self.timeline.extend(records)
+        return self.timeline
+
+
+def chart_window(target_date: date) -> tuple[int, int]:
+    """Returns the epoch seconds the chart covers for a day (7 AM to midnight, local time)."""
+    local_tz = datetime.now().astimezone().tzinfo
+    chart_start_dt = datetime.combine(target_date, time(CHART_START_HOUR, 0), tzinfo=local_tz)
+    chart_end_dt = datetime.combine(target_date + timedelta(days=1), time(0, 0), tzinfo=local_tz)
+    return int(chart_start_dt.timestamp()), int(chart_end_dt.timestamp())
+
+
+def hour_ticks(seconds_per_pixel: float) -> list[tuple[int, int]]:
+    """Returns (x, width) of each hour tick; 9:00 and 17:00 get wide ones."""
+    return [
+        (int((hour - CHART_START_HOUR) * 3600 / seconds_per_pixel), 3 if hour == 9 or hour == 17 else 1)
+        for hour in range(CHART_START_HOUR, 24)
+    ]
+
+
+def merge_segments(
+    times: array,
+    codes: array,
+    validities: array,
+    chart_start: int,
+    chart_end: int,
+    unknown_code: int
+) -> list[tuple[int, int, int]]:
+    """Merges sorted samples into contiguous (start, end, code) segments covering the chart.
+
+    Consecutive samples of the same category form one block as long as each
+    one is still valid when the next arrives. A block lasts until its last
+    sample's validity runs out, clipped to the next block. Everything in
+    between is Unknown.
+    """
+    if not times:
+        return [(chart_start, chart_end, unknown_code)]
+
+    # Indices where a new block starts: category change or a gap that is too long
+    breaks = [0] + [
+        i for i, (t0, t1, c0, c1, v0) in enumerate(zip(times, times[1:], codes, codes[1:], validities), 1)
+        if c1 != c0 or t1 - t0 > v0
+    ]
+    block_starts = [times[i] for i in breaks]
+    block_ends = [
+        min(times[last] + validities[last], next_start, chart_end)
+        for last, next_start in zip([i - 1 for i in breaks[1:]] + [len(times) - 1], block_starts[1:] + [chart_end])
+    ]
+
+    segments = []
+    current = chart_start
+    for block_start, block_end, i in zip(block_starts, block_ends, breaks):
+        if block_start > current:
+            segments.append((current, block_start, unknown_code))
+        segments.append((block_start, block_end, codes[i]))
+        current = block_end
+    if current < chart_end:
+        segments.append((current, chart_end, unknown_code))
+    return segments
+
+
+def rasterize(
+    segments: list[tuple[int, int, int]],
+    chart_start: int,
+    seconds_per_pixel: float,
+    chart_width: int
+) -> tuple[bytes, list[tuple[int, int, int]]]:
+    """Maps segments to one row of per-pixel category codes.
+
+    Returns the row and the segments that cover at least one pixel. A segment
+    owns its pixels up to where the next visible segment starts, so a one-pixel
+    boundary goes to the later segment.
+    """
+    visible = []
+    columns = []
+    for start, end, code in segments:
+        start_pixel = max(0, int((start - chart_start) / seconds_per_pixel))
+        end_pixel = min(chart_width, int((end - chart_start) / seconds_per_pixel))
+        if end_pixel > start_pixel:
+            visible.append((start, end, code))
+            columns.append((start_pixel, code))
+    row = b"".join(
+        bytes((code,)) * (next_pixel - start_pixel)
+        for (start_pixel, code), (next_pixel, _) in zip(columns, columns[1:] + [(chart_width, 0)])
+    )
+    return row, visible
+
+
+def changed_columns(old_row: bytes, new_row: bytes) -> tuple[int, int] | None:
+    """Returns the [first, last) range of pixel columns that differ, or None if the rows match."""
+    if old_row == new_row:
+        return None
+    first = next(x for x in range(len(new_row)) if old_row[x] != new_row[x])
+    last = next(x for x in reversed(range(len(new_row))) if old_row[x] != new_row[x])
+    return first, last + 1
+
+
+class ChartRenderer:
+    """Renders the chart to output_path, reusing whatever didn't change since the last frame.
+
+    The font and the hour tick layer are built once per day, only the pixel
+    columns whose category changed get repainted, and the PNG is rewritten
+    (atomically, via a temp file) only when the frame actually differs. With
+    output_path None nothing is written; the last frame is always in self.image.
+    """
+
+    def __init__(self, output_path: str | None, chart_width: int, chart_height: int, category_colors: dict):
+        self.output_path = output_path
+        self.chart_width = chart_width
+        self.chart_height = chart_height
+        self.category_names = list(category_colors)
+        # Category codes double as palette indices
+        self.palette = [channel for color, _ in category_colors.values() for channel in color]
+        self.date = None
+        self.last_frame = None # Raw pixels of the last PNG written
+        self.image = None # The last frame rendered
+
+        # Load a font
+        try:
+            self.font = ImageFont.load_default(size=18)
+        except AttributeError: # Older PIL might not support size
+             self.font = ImageFont.load_default()
+        # Removed OSError handling
+
+    def _start_day(self, target_date: date):
+        """Sets up the time range, tick layer and an empty bar for a new day."""
+        self.date = target_date
+
+        # Define the time range for the chart (7 AM to midnight)
+        self.local_tz = datetime.now().astimezone().tzinfo
+        self.chart_start, self.chart_end = chart_window(target_date)
+
+        # Calculate seconds per pixel
+        self.seconds_per_pixel = (self.chart_end - self.chart_start) / self.chart_width
+
+        # --- Draw Hour Ticks --- onto a transparent layer that gets pasted over repainted columns
+        self.ticks = Image.new('RGBA', (self.chart_width, self.chart_height))
+        draw = ImageDraw.Draw(self.ticks)
+        tick_color = (255, 255, 255, 255)
+        for tick_x, tick_width in hour_ticks(self.seconds_per_pixel):
+            draw.line([(tick_x, 0), (tick_x, self.chart_height)], fill=tick_color, width=tick_width)
+
+        # Bar with ticks, and the per-pixel category codes it was painted from
+        self.bar = Image.new('RGB', (self.chart_width, self.chart_height))
+        self.row = None
+
+    def _repaint(self, row: bytes, first: int, last: int):
+        """Repaints columns [first, last) of the bar from the per-pixel category codes."""
+        width = last - first
+        box = (first, 0, last, self.chart_height)
+        # Palette-map the per-pixel codes into the image in one go
+        strip = Image.frombuffer('P', (width, self.chart_height), row[first:last] * self.chart_height, 'raw', 'P', 0, 1)
+        strip.putpalette(self.palette)
+        self.bar.paste(strip.convert('RGB'), box)
+        ticks = self.ticks.crop(box)
+        self.bar.paste(ticks, box, ticks)
+
+    def render(self, timeline: Timeline, target_date: date, is_active: bool) -> list[tuple[int, int, int]]:
+        """Renders the timeline chart for the target date and returns its segments."""
+        log.debug("Generating chart for %s (Active: %s)", target_date, is_active)
+        if target_date != self.date:
+            self._start_day(target_date)
+        category_names = self.category_names
+        local_tz = self.local_tz
+
+        # Only the samples inside the chart's time range
+        timeline = timeline.between(self.chart_start, self.chart_end)
+
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Chart data points (%d):", len(timeline))
+            for ts, code in zip(timeline.times, timeline.codes):
+                log.debug("  %s - %s", datetime.fromtimestamp(ts, local_tz).isoformat(), category_names[code])
+
+        # --- Draw intervals ---
+        with metrics.timed("merge"):
+            segments = merge_segments(timeline.times, timeline.codes, timeline.validities, self.chart_start, self.chart_end, category_names.index("Unknown"))
+        with metrics.timed("rasterize"):
+            row, visible_segments = rasterize(segments, self.chart_start, self.seconds_per_pixel, self.chart_width)
+        dirty = (0, self.chart_width) if self.row is None else changed_columns(self.row, row)
+        if dirty:
+            self._repaint(row, *dirty)
+            self.row = row
+
+        # Total work time
+        work_code = category_names.index("Work")
+        work_segments = [(start, end) for start, end, code in visible_segments if code == work_code]
+        total_work_seconds = sum(end - start for start, end in work_segments)
+
+        if log.isEnabledFor(logging.DEBUG):
+            for n, (start, end, code) in enumerate(visible_segments, 1):
+                duration_seconds = end - start
+                log.debug("  Segment #%d: Start=%s, End=%s, Duration=%dm %ds, Category=%s", n,
+                          datetime.fromtimestamp(start, local_tz).isoformat(), datetime.fromtimestamp(end, local_tz).isoformat(),
+                          duration_seconds // 60, duration_seconds % 60, category_names[code])
+
+        # Pause indicator and text go on a copy so the bar stays reusable
+        image = self.bar.copy()
+        draw = ImageDraw.Draw(image)
+
+        # --- Draw Paused Indicator (if needed) ---
+        if not is_active:
+            pause_color = (255, 255, 0)
+            bottom_y = self.chart_height - 1
+            draw.line([(0, bottom_y), (self.chart_width -1, bottom_y)], fill=pause_color, width=1)
+
+        # --- Draw Total Work Time ---
+        # Calculate hours and minutes
+        total_work_minutes = int(total_work_seconds // 60)
+        work_hours = total_work_minutes // 60
+        work_minutes = total_work_minutes % 60
+        work_time_str = f"Work: {work_hours}h {work_minutes}m"
+
+        # Debug breakdown of work time calculation
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Work segments breakdown:")
+            for i, (start, end) in enumerate(work_segments, 1):
+                log.debug("  Segment #%d: %s to %s - %dm %ds", i,
+                          datetime.fromtimestamp(start, local_tz).strftime("%H:%M:%S"),
+                          datetime.fromtimestamp(end, local_tz).strftime("%H:%M:%S"),
+                          (end - start) // 60, (end - start) % 60)
+
+        # Text properties
+        text_color = (255, 255, 255)
+        margin = 5
+        bottom_padding = 10 # Padding from the bottom edge
+
+        # Calculate text size and position
+        try:
+            bbox = draw.textbbox((0, 0), work_time_str, font=self.font)
+            text_width = bbox[2] - bbox[0]
+            text_height = bbox[3] - bbox[1]
+        except AttributeError: # Older PIL might use textsize
+             text_width, text_height = draw.textsize(work_time_str, font=self.font)
+
+        # Position at bottom right
+        text_x = self.chart_width - text_width - margin
+        text_y = self.chart_height - text_height - bottom_padding # Position near the bottom
+
+        # Ensure text doesn't go below the image (shouldn't happen with this calculation, but good practice)
+        text_y = max(0, text_y)
+
+        # Draw the text
+        draw.text((text_x, text_y), work_time_str, fill=text_color, font=self.font)
+
+        # Save the image, but only if it changed, and never leave a half-written file behind
+        self.image = image
+        frame = None if self.output_path is None else image.tobytes()
+        if frame is None:
+            outcome = "rendered in memory"
+        elif frame == self.last_frame:
+            outcome = f"unchanged at {self.output_path}"
+        else:
+            with metrics.timed("png_encode"):
+                image.save(self.output_path + ".tmp", format="PNG")
+            os.replace(self.output_path + ".tmp", self.output_path)
+            self.last_frame = frame
+            outcome = f"saved to {self.output_path}"
+        log.info("Chart for %s %s: %d points, %d segments, %d dirty columns, %s",
+                 target_date, outcome, len(timeline), len(visible_segments), dirty[1] - dirty[0] if dirty else 0, work_time_str)
+        return segments
 
 
 def generate_chart(
-    data_dir: str,
+    timeline: Timeline,
     output_path: str,
     chart_width: int,
     chart_height: int,
@@ -52,264 +355,5 @@ def generate_chart(
     target_date: date,
     is_active: bool # Add parameter to indicate if analysis is active
 ):
-    """Generates the timeline chart image for the target date."""
-    # Debug counters for work time calculation
-    debug_total_segments = 0
-    debug_work_segments = 0
-    debug_work_seconds_by_segment = []
-    """Generates the timeline chart image for the target date."""
-    print(f"Generating chart for {target_date.isoformat()} (Active: {is_active})...")
-
-    # Define the time range for the chart (7 AM to midnight)
-    local_tz = datetime.now().astimezone().tzinfo
-    chart_start_dt = datetime.combine(target_date, time(7, 0), tzinfo=local_tz)
-    chart_end_dt = datetime.combine(target_date + timedelta(days=1), time(0, 0), tzinfo=local_tz)
-    total_duration_seconds = (chart_end_dt - chart_start_dt).total_seconds()
-
-    # Read and sort data points for the target date
-    data_points = read_data(data_dir, target_date)
-
-    # Filter points outside the chart's time range
-    data_points = [dp for dp in data_points if chart_start_dt <= dp[0] < chart_end_dt]
-
-    print(f"--- Chart Data Points ({len(data_points)}) ---")
-    for dt, cat in data_points:
-        print(f"  {dt.isoformat()} - {cat}")
-    print("--------------------------")
-
-    # Create the image
-    unknown_color_tuple = category_colors.get("Unknown", ((211, 211, 211), ""))[0]
-    image = Image.new('RGB', (chart_width, chart_height), unknown_color_tuple)
-    draw = ImageDraw.Draw(image)
-
-    # Calculate seconds per pixel
-    seconds_per_pixel = total_duration_seconds / chart_width
-    unknown_color = category_colors.get("Unknown", ((211, 211, 211), ""))[0]
-
-    # Initialize total work time counter
-    total_work_seconds = 0
-
-    # Store work segment information
-    work_segments_info = []
-
-    # Helper to draw a rectangle
-    def draw_segment(start_dt, end_dt, color_tuple, category_name):
-        nonlocal total_work_seconds, debug_total_segments, debug_work_segments, debug_work_seconds_by_segment, work_segments_info
-        color = color_tuple[0]
-        duration_seconds = (end_dt - start_dt).total_seconds()
-
-        if duration_seconds <= 0:
-            return
-
-        start_pixel = int((start_dt - chart_start_dt).total_seconds() / seconds_per_pixel)
-        end_pixel = int((end_dt - chart_start_dt).total_seconds() / seconds_per_pixel)
-
-        start_pixel = max(0, start_pixel)
-        end_pixel = min(chart_width, end_pixel)
-
-        if end_pixel > start_pixel:
-            debug_total_segments += 1
-            segment_time_str = f"{int(duration_seconds // 60)}m {int(duration_seconds % 60)}s"
-            print(f"  Drawing segment #{debug_total_segments}: Start={start_dt.isoformat()}, End={end_dt.isoformat()}, Duration={segment_time_str}, Category={category_name}, Pixels=[{start_pixel}, {end_pixel}]")
-            draw.rectangle([(start_pixel, 0), (end_pixel, chart_height)], fill=color)
-            if category_name == "Work":
-                debug_work_segments += 1
-                total_work_seconds += duration_seconds
-                debug_work_seconds_by_segment.append(duration_seconds)
-                # Store work segment info for later display
-                work_segments_info.append((start_dt, end_dt, duration_seconds))
-                start_time_str = start_dt.strftime("%H:%M:%S")
-                end_time_str = end_dt.strftime("%H:%M:%S")
-                print(f"    [WORK] Segment #{debug_total_segments}: {start_time_str} to {end_time_str} - Added {duration_seconds:.2f}s ({segment_time_str}) to Work time. Total: {total_work_seconds:.2f}s")
-
-    # --- Draw intervals ---
-    print("--- Drawing Intervals (with merging logic) ---")
-    current_dt = chart_start_dt
-    i = 0
-    while i < len(data_points):
-        event_dt, category = data_points[i]
-        event_dt = max(event_dt, chart_start_dt)
-        event_dt = min(event_dt, chart_end_dt)
-
-        # 1. Draw Unknown Gap before the current event/block
-        if event_dt > current_dt:
-            draw_segment(current_dt, event_dt, category_colors["Unknown"], "Unknown (Gap)")
-            current_dt = event_dt # current_dt is now the start of the potential block
-
-        # If current_dt reached the end due to gap filling, stop
-        if current_dt >= chart_end_dt:
-             break
-
-        # 2. Find the end of the contiguous block of the same category
-        # start_of_block_dt = current_dt # This is the drawing start time
-        current_block_category = category
-        last_event_in_block_dt = event_dt
-        k = i # k is the index of the last event included in the current block
-
-        # Look ahead to merge
-        j = i + 1
-        while j < len(data_points):
-            next_event_dt, next_category = data_points[j]
-            next_event_dt = min(next_event_dt, chart_end_dt) # Ensure next event is within chart bounds
-
-            gap_seconds = (next_event_dt - last_event_in_block_dt).total_seconds()
-
-            if next_category == current_block_category and gap_seconds <= MAX_VALIDITY_SECONDS:
-                # Merge: Update the last event time and index for this block
-                last_event_in_block_dt = next_event_dt
-                k = j
-                j += 1 # Continue looking ahead
-            else:
-                # Stop merging (category change, gap too large, or end of chart)
-                break
-        # After the inner loop, 'k' holds the index of the last data point in the merged block
-        # 'last_event_in_block_dt' holds the timestamp of that last data point
-
-        # 3. Calculate the end time for the colored block
-        # The validity extends from the *last* point in the block
-        max_valid_end_dt = last_event_in_block_dt + timedelta(seconds=MAX_VALIDITY_SECONDS)
-        # The block must end before the *next* data point that *didn't* merge
-        next_block_start_dt = data_points[k+1][0] if k + 1 < len(data_points) else chart_end_dt
-        next_block_start_dt = min(next_block_start_dt, chart_end_dt) # Ensure next start is within bounds
-
-        colored_block_end_dt = min(max_valid_end_dt, next_block_start_dt)
-
-        # Ensure end time does not exceed chart end
-        colored_block_end_dt = min(colored_block_end_dt, chart_end_dt)
-
-        # 4. Draw the (potentially merged) segment
-        color_desc_tuple = category_colors.get(current_block_category, category_colors["Other"])
-        # The segment starts at current_dt (which was updated to event_dt if a gap was drawn)
-        draw_segment(current_dt, colored_block_end_dt, color_desc_tuple, current_block_category)
-
-        # 5. Update current_dt for the next iteration's gap calculation
-        current_dt = colored_block_end_dt
-
-        # 6. Advance the main loop index past the processed block
-        i = k + 1
-
-        # Exit if we've filled the chart (redundant check, but safe)
-        if current_dt >= chart_end_dt:
-            break
-
-    # Draw final unknown gap if needed
-    if current_dt < chart_end_dt:
-        draw_segment(current_dt, chart_end_dt, category_colors["Unknown"], "Unknown (End Gap)")
-
-    print("-----------------------")
-
-
-    # --- Draw Hour Ticks ---
-    print("--- Drawing Hour Ticks ---")
-    tick_color = (255, 255, 255)
-    start_hour = chart_start_dt.hour
-    end_hour = chart_end_dt.hour
-
-    for hour in range(start_hour, 24):
-        tick_dt = datetime.combine(target_date, time(hour, 0), tzinfo=local_tz)
-
-        if tick_dt >= chart_start_dt and tick_dt < chart_end_dt:
-            time_offset_seconds = (tick_dt - chart_start_dt).total_seconds()
-            tick_x = int(time_offset_seconds / seconds_per_pixel)
-
-            if hour == 9 or hour == 17:
-                tick_width = 3
-                print(f"  Drawing wide tick at {hour}:00 (x={tick_x})")
-                draw.line([(tick_x, 0), (tick_x, chart_height)], fill=tick_color, width=tick_width)
-            else:
-                tick_width = 1
-                print(f"  Drawing tick at {hour}:00 (x={tick_x})")
-                draw.line([(tick_x, 0), (tick_x, chart_height)], fill=tick_color, width=tick_width)
-
-    print("------------------------")
-
-    # --- Draw Paused Indicator (if needed) ---
-    if not is_active:
-        print("--- Drawing Paused Indicator ---")
-        pause_color = (255, 255, 0)
-        bottom_y = chart_height - 1
-        draw.line([(0, bottom_y), (chart_width -1, bottom_y)], fill=pause_color, width=1)
-        print(f"  Drew yellow line at y={bottom_y}")
-        print("-----------------------------")
-
-    # --- Draw Total Work Time ---
-    print("--- Drawing Total Work Time ---")
-    # Calculate hours and minutes
-    total_work_minutes = int(total_work_seconds // 60)
-    work_hours = total_work_minutes // 60
-    work_minutes = total_work_minutes % 60
-    work_time_str = f"Work: {work_hours}h {work_minutes}m"
-
-    # Debug summary of work time calculation
-    print(f"\n=== WORK TIME CALCULATION SUMMARY ===")
-    print(f"  Total segments drawn: {debug_total_segments}")
-    print(f"  Work segments: {debug_work_segments}")
-    print(f"  Total work seconds: {total_work_seconds:.2f}s ({total_work_minutes} minutes)")
-    print(f"  Formatted work time: {work_time_str}")
-
-    if debug_work_segments > 0:
-        print(f"\n  Work segments breakdown:")
-        for i, (start_dt, end_dt, seconds) in enumerate(work_segments_info):
-            minutes = int(seconds // 60)
-            secs = int(seconds % 60)
-
-            start_time_str = start_dt.strftime("%H:%M:%S")
-            end_time_str = end_dt.strftime("%H:%M:%S")
-
-            print(f"    Segment #{i+1}: {start_time_str} to {end_time_str} - {minutes}m {secs}s ({seconds:.2f}s)")
-
-    print(f"=====================================\n")
-
-    # Load a font
-    try:
-        font = ImageFont.load_default(size=18)
-    except AttributeError: # Older PIL might not support size
-         font = ImageFont.load_default()
-    # Removed OSError handling
-
-    # Text properties
-    text_color = (255, 255, 255)
-    margin = 5
-    bottom_padding = 10 # Padding from the bottom edge
-
-    # Calculate text size and position
-    try:
-        bbox = draw.textbbox((0, 0), work_time_str, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-    except AttributeError: # Older PIL might use textsize
-         text_width, text_height = draw.textsize(work_time_str, font=font)
-
-    # Position at bottom right
-    text_x = chart_width - text_width - margin
-    text_y = chart_height - text_height - bottom_padding # Position near the bottom
-
-    # Ensure text doesn't go below the image (shouldn't happen with this calculation, but good practice)
-    text_y = max(0, text_y)
-
-    # Draw the text
-    draw.text((text_x, text_y), work_time_str, fill=text_color, font=font)
-    print(f"  Drew text '{work_time_str}' at ({text_x}, {text_y})")
-    print("-----------------------------")
-
-    # Save the image
-    image.save(output_path)
-    print(f"Chart saved to: {output_path}")
-
-if __name__ == '__main__':
-    # Example usage: Generate chart for today and save to /tmp/time.png
-    print("Running chart generation directly (for testing)...")
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(script_dir, 'data')
-    output_file = '/tmp/time.png'
-    chart_w = 1000
-    chart_h = 44
-    today = date.today()
-
-    # Ensure data directory exists for testing
-    os.makedirs(data_dir, exist_ok=True)
-    # Removed dummy data creation block
-
-    # Example usage needs to pass the is_active flag now
-    generate_chart(data_dir, output_file, chart_w, chart_h, CATEGORY_COLORS, today, is_active=True) # Example: assume active
-    print("Chart generation test finished.")
+    """Generates the timeline chart image for the target date in one go."""
+    ChartRenderer(output_path, chart_width, chart_height, category_colors).render(timeline, target_date, is_active)
@@ -0,0 +1,35 @@
+"""Renders charts on demand (status bars, past days) without the tracker or its API client.
+
+Kept out of chart.py so that merge and report, which import chart, can be
+imported at the top instead of chart running a second time as __main__.
+"""
+import argparse
+import logging
+import os
+from datetime import date
+import merge
+import report
+from chart import CATEGORY_COLORS, generate_chart, read_data
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render the chart for a day, or one row per day for a range.")
+    parser.add_argument("start", type=date.fromisoformat, nargs="?", default=date.today(), help="Day to render, YYYY-MM-DD (default: today).")
+    parser.add_argument("end", type=date.fromisoformat, nargs="?", help="Last day of a range, YYYY-MM-DD: draws one row per day, like report.py.")
+    parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"), help="Data directory.")
+    parser.add_argument("--merge", nargs="+", default=[], metavar="DIR", help="Other data directories (other machines) to merge in, for a single day.")
+    parser.add_argument("--policy", choices=merge.POLICIES, default="priority", help="Which source wins where merged ones disagree: latest or priority.")
+    parser.add_argument("--output", default="/tmp/time.png", help="Where to save the chart.")
+    parser.add_argument("--width", type=int, default=1000, help="Chart width in pixels.")
+    parser.add_argument("--height", type=int, default=44, help="Chart height in pixels (per day for a range).")
+    args = parser.parse_args()
+    if args.end and args.merge:
+        parser.error("--merge only works for a single day")
+    logging.basicConfig(level=logging.INFO)
+
+    if args.end:
+        report.generate_report(args.data_dir, args.output, args.start, args.end, args.width, args.height)
+    elif args.merge:
+        timeline = merge.read_merged([args.data_dir] + args.merge, args.start, args.policy)
+        generate_chart(timeline, args.output, args.width, args.height, CATEGORY_COLORS, args.start, is_active=True)
+    else:
+        generate_chart(read_data(args.data_dir, args.start), args.output, args.width, args.height, CATEGORY_COLORS, args.start, is_active=True)
@@ -1,39 +1,93 @@
 import argparse
 import base64
+import cProfile
+import logging
 import os
+import queue
+import select
 import signal # Import signal module
-import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
-from openai import OpenAI
-from chart import generate_chart, CATEGORY_COLORS
+import capture
+import merge
+import metrics
+import payload
+import rollup
+import storage
+from classify import Classifier
+from query import QueryServer
+from dedup import dhash, ScreenCache
+from chart import ChartRenderer, CATEGORY_COLORS, CATEGORY_NAMES, VALIDITY_SLACK_SECONDS, DayReader
+from schedule import AdaptiveScheduler
 
 # --- Configuration ---
 API_KEY_FILE = "api_key.txt"
 AI_MODEL = "google/gemini-flash-1.5-8b"
-image_path = "/tmp/screen.jpg" # Temporary screenshot file
+API_BASE_URL = "https://openrouter.ai/api/v1"
+api_base_url = API_BASE_URL # OpenAI-compatible API to use, see --base-url
+capture_backend = "grim" # Default screenshot backend, see capture.BACKENDS
+capture_outputs = [None] # Outputs captured separately (and in parallel) each cycle, e.g. ["DP-1", "HDMI-A-1"]; None is the whole screen
+merge_policy = "priority" # Which output's analysis wins when they disagree, see merge.py
 output_dir = "data" # Directory for saving analysis results
 chart_output_path = "/tmp/time.png" # Path for the generated chart
 chart_width = 1000
 chart_height = 44
+dedup_max_distance = 4 # Screens whose hashes differ in at most this many bits reuse the cached analysis
+dedup_cache_size = 64 # Number of recent screens to remember
+payload_max_bytes = 150_000 # Screenshots are scaled down and recompressed until they fit (see payload.py)
+local_confidence_threshold = 0.9 # Below this the local classifier defers to the LLM
+max_in_flight = 4 # Screenshots being analyzed at once; captures beyond this are dropped
+max_delay_seconds = 300 # Cap for the capture interval while the activity doesn't change
+backoff_factor = 1.5 # Interval growth per repeated category
+validity_slack_seconds = VALIDITY_SLACK_SECONDS # How long a sample stays valid past the next scheduled capture
+screen_change_distance = 16 # Screen hash bits that must differ to count as a big change
+idle_flag_path = "/tmp/track-idle" # Captures are skipped while this file exists
+metrics_path = "/tmp/track.prom" # Prometheus textfile with per-stage latency percentiles
+trace_path = "/tmp/track-trace.jsonl" # One line per timed stage
+profile_path = "/tmp/track.prof" # cProfile output for --profile
+query_port = 8098 # Local query API for status bars (see query.py), on 127.0.0.1; None to disable
 # Allowed categories are now derived from chart.CATEGORY_COLORS.keys()
 # --- End Configuration ---
 
+log = logging.getLogger(__name__)
+
 # --- Global State for Signal Handling ---
 is_running = True # Start in the running state
+day_reader = DayReader(output_dir) # Today's samples, kept in memory between cycles
+screen_cache = ScreenCache(dedup_max_distance, dedup_cache_size)
+classifier = Classifier([name for name in CATEGORY_NAMES if name not in ("Unknown", "Fail")]) # Trained from data/ in main()
+renderer = ChartRenderer(chart_output_path, chart_width, chart_height, CATEGORY_COLORS)
+today_segments = None # Segments of the last render, to know when today's rollup is stale
+query_server = None # Started in main() unless query_port is None
 # --- End Global State ---
 
+# --- Pipeline State ---
+analysis_pool = ThreadPoolExecutor(max_workers=max_in_flight)
+capture_pool = None # One thread per output, started in main()
+output_pool = None # Analyzes the outputs of one cycle at once, started in main()
+in_flight = threading.BoundedSemaphore(max_in_flight)
+pending = queue.Queue() # (timestamp, validity, future) in capture order
+chart_dirty = threading.Event() # Set when the chart needs re-rendering
+wake_read, wake_write = os.pipe() # Self-pipe that cuts the main loop's wait short
+# --- End Pipeline State ---
+
 # --- Signal Handler ---
 def handle_sigusr1(signum, frame):
-    """Toggles the running state when SIGUSR1 is received."""
+    """Toggles the running state when SIGUSR1 is received.
+
+    Only flips the flag and wakes the main loop, which does the rest; taking
+    locks or rendering here could deadlock against the interrupted code.
+    """
     global is_running
-    previous_state = is_running
     is_running = not is_running
-    status = "ENABLED" if is_running else "DISABLED"
-    print(f"\nSIGUSR1 received. Analysis toggled to: {status}\n")
-    # Regenerate chart immediately if state changed, to reflect pause/resume visually
-    if is_running != previous_state:
-        update_chart()
+    wake()
+
+
+def wake():
+    """Wakes the main loop from its wait. Safe to call from signal handlers and other threads."""
+    os.write(wake_write, b"x")
 # --- End Signal Handler ---
 
 
@@ -45,71 +99,23 @@ def load_api_key(filepath):
     # Removed error handling for empty or missing file
     return key
 
-# --- Load API Key ---
-api_key = load_api_key(API_KEY_FILE)
-
-# --- Initialize OpenAI Client ---
-client = OpenAI(
-  base_url="https://openrouter.ai/api/v1",
-  api_key=api_key,
-)
+# --- OpenAI Client ---
+client = None # Created on first use, so importing this module stays cheap
 
 
-# --- Core Logic ---
-def capture_and_analyze():
-    """Captures screenshot, sends to LLM, and returns the analysis."""
-    # Capture the screenshot using grim
-    grim_command = ["grim", "-t", "jpeg", "-s", "0.5", image_path]
-    print(f"Running command: {' '.join(grim_command)}")
-    result = subprocess.run(grim_command, check=True, capture_output=True, text=True)
-    print("Screenshot captured successfully.")
-    # Removed error handling for grim
-
-    # Read the image file and encode it in base64
-    with open(image_path, "rb") as image_file:
-        image_bytes = image_file.read()
-    base64_image = base64.b64encode(image_bytes).decode('utf-8')
-    image_data_url = f"data:image/jpeg;base64,{base64_image}"
-    # Removed error handling for file reading/encoding
-
-    # Clean up the temporary screenshot file
-    os.remove(image_path)
-    print(f"Removed temporary file: {image_path}")
-    # Removed error handling for os.remove
-
-    # Call the LLM API
-    print("Sending request to LLM...")
-    completion = client.chat.completions.create(
-      model=AI_MODEL,
-      messages=[
-        {
-          "role": "user",
-          "content": [
-            {
-              "type": "text",
-              "text": "Here's my screen. What am I doing? For time tracking purposes. Answer in one sentence."
-            },
-            {
-              "type": "image_url",
-              "image_url": {
-                "url": image_data_url
-              }
-            }
-          ]
-        }
-      ],
-    )
-    # Keep this specific error check as requested
-    if completion.choices == None:
-        print("Backend failed:")
-        print(completion)
-        return "Fail", "Backend failed"
+def get_client():
+    """Returns the OpenAI client, creating it (and reading the API key) on first use."""
+    global client
+    if client is None:
+        from openai import OpenAI # Slow to import, and only needed once there's something to analyze
+        client = OpenAI(base_url=api_base_url, api_key=load_api_key(API_KEY_FILE))
+    return client
 
-    result_text = completion.choices[0].message.content
-    print(f"LLM Response: {result_text}")
 
-    # --- Second API Call: Categorization ---
-    print("Sending request to LLM for categorization...")
+# --- Core Logic ---
+def categorize(client, result_text):
+    """Asks the LLM which of CATEGORY_COLORS an activity description belongs to."""
+    log.debug("Sending request to LLM for categorization...")
     allowed_category_names = list(CATEGORY_COLORS.keys())
     prompt_category_list = []
     for name, (color, description) in CATEGORY_COLORS.items():
@@ -123,16 +129,17 @@ Please categorize this activity into ONE of the following categories based on th
 
 Respond with ONLY the category name (e.g., "Programming", "Social media")."""
 
-    completion = client.chat.completions.create(
-      model=AI_MODEL,
-      messages=[
-        {
-          "role": "user",
-          "content": categorization_prompt
-        }
-      ],
-      temperature=0.2,
-    )
+    with metrics.timed("categorize"):
+        completion = client.chat.completions.create(
+          model=AI_MODEL,
+          messages=[
+            {
+              "role": "user",
+              "content": categorization_prompt
+            }
+          ],
+          temperature=0.2,
+        )
     category_text = completion.choices[0].message.content.strip()
 
     # Validate the category against the defined colors
@@ -143,88 +150,257 @@ Respond with ONLY the category name (e.g., "Programming", "Social media")."""
     if category_text in valid_categories_for_llm:
         validated_category = category_text
     else:
-        print(f"Warning: LLM returned invalid category '{category_text}'. Defaulting to 'Other'.")
+        log.warning("LLM returned invalid category '%s'. Defaulting to 'Other'.", category_text)
         validated_category = "Other"
 
-    print(f"LLM Category: {validated_category}")
+    return validated_category
+
+
+def describe(client, image_bytes):
+    """Asks the LLM what the screenshot shows, in one sentence. Returns None if the backend failed."""
+    # Encode straight from the image buffer into the data URL
+    with metrics.timed("encode"):
+        image_data_url = (b"data:image/jpeg;base64," + base64.b64encode(image_bytes)).decode('ascii')
+
+    # Call the LLM API
+    log.debug("Sending request to LLM...")
+    with metrics.timed("describe"):
+        completion = client.chat.completions.create(
+          model=AI_MODEL,
+          messages=[
+            {
+              "role": "user",
+              "content": [
+                {
+                  "type": "text",
+                  "text": "Here's my screen. What am I doing? For time tracking purposes. Answer in one sentence."
+                },
+                {
+                  "type": "image_url",
+                  "image_url": {
+                    "url": image_data_url
+                  }
+                }
+              ]
+            }
+          ],
+        )
+    # Keep this specific error check as requested
+    if completion.choices == None:
+        log.warning("Backend failed: %s", completion)
+        return None
+
+    result_text = completion.choices[0].message.content
+    log.debug("LLM Response: %s", result_text)
+    return result_text
+
+
+def analyze(image_bytes, screen_hash):
+    """Sends a screenshot to the LLM and returns the analysis."""
+    # Skip the LLM entirely if we've recently seen (nearly) this exact screen
+    cached = screen_cache.lookup(screen_hash)
+    log.debug("Screen cache today: %d hits, %d misses", screen_cache.hits, screen_cache.misses)
+    if cached:
+        log.debug("Screen unchanged, reusing cached analysis: %s", cached)
+        return cached
+
+    # Shrink the screenshot to the byte budget before it goes over the wire
+    with metrics.timed("payload"):
+        payload_bytes = payload.fit(image_bytes, payload_max_bytes)
+    log.debug("Payload: %d bytes (captured %d)", len(payload_bytes), len(image_bytes))
+    result_text = describe(get_client(), payload_bytes)
+    if result_text is None:
+        return "Fail", "Backend failed"
+
+    # --- Local categorization, only asking the LLM when unsure ---
+    with metrics.timed("categorize_local"):
+        local_category, confidence = classifier.predict(result_text)
+    if confidence >= local_confidence_threshold:
+        log.debug("Local Category: %s (confidence %.2f)", local_category, confidence)
+        screen_cache.store(screen_hash, local_category, result_text)
+        return local_category, result_text
+    log.debug("Local classifier unsure (%s, confidence %.2f), asking the LLM.", local_category, confidence)
+
+    # --- Second API Call: Categorization ---
+    validated_category = categorize(get_client(), result_text)
+    log.debug("LLM Category: %s", validated_category)
+    classifier.learn(result_text, validated_category)
+    screen_cache.store(screen_hash, validated_category, result_text)
     return validated_category, result_text
     # Removed error handling for the second API call
 
 
+def analyze_outputs(images, screen_hashes):
+    """Analyzes one cycle's screenshots, one per output, at once and reconciles them into one sample."""
+    if len(images) == 1:
+        return analyze(images[0], screen_hashes[0])
+    results = list(output_pool.map(analyze, images, screen_hashes))
+    log.debug("Per-output analyses: %s", results)
+    return merge.reconcile(results, merge_policy)
+
+
 # --- Chart Update Function ---
 def update_chart():
     """Generates or updates the chart based on current data and state."""
-    print("Attempting to update chart...")
+    global today_segments
     today = date.today()
-    generate_chart(
-        data_dir=output_dir,
-        output_path=chart_output_path,
-        chart_width=chart_width,
-        chart_height=chart_height,
-        category_colors=CATEGORY_COLORS,
-        target_date=today,
-        is_active=is_running # Pass the current running state
-    )
+    with metrics.timed("read_data"):
+        timeline = day_reader.for_date(today)
+    with metrics.timed("render"):
+        segments = renderer.render(timeline, today, is_active=is_running) # Pass the current running state
+    # Keep today's rollup current for reports
+    if segments != today_segments:
+        rollup.save(output_dir, today, rollup.from_segments(segments))
+        today_segments = segments
+    if query_server:
+        query_server.publish(today, timeline, is_running)
     # Removed error handling for chart generation
 # --- End Chart Update Function ---
 
 
-def main(delay_seconds):
-    """Main loop to capture, analyze, save, and wait."""
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-    print(f"Ensured output directory exists: {output_dir}")
-
-    # Register the signal handler
-    signal.signal(signal.SIGUSR1, handle_sigusr1)
-    print(f"Process ID: {os.getpid()}. Send SIGUSR1 to toggle analysis.")
-    print(f"Initial state: {'ENABLED' if is_running else 'DISABLED'}")
+# --- Pipeline Workers ---
+def render_worker():
+    """Re-renders the chart whenever it has been marked dirty."""
+    while True:
+        chart_dirty.wait()
+        chart_dirty.clear()
+        update_chart()
 
 
+def commit_worker(scheduler):
+    """Saves analysis results to the day log in capture order as they complete."""
     while True:
-        print(f"\nCycle start at {datetime.now().isoformat()}. State: {'RUNNING' if is_running else 'PAUSED'}")
-
-        category = None
-        description = None
-
-        if is_running:
-            print("State is RUNNING, performing analysis...")
-            category, description = capture_and_analyze()
-
-            if category and description: # Check if analysis was successful
-                # Generate timestamped filename
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_filename = os.path.join(output_dir, f"{timestamp}.txt")
-
-                # Save the result
-                with open(output_filename, "w") as f:
-                    f.write(f"{category}\n")
-                    f.write(description)
-                print(f"Saved analysis to: {output_filename}")
-                # Removed error handling for file writing
-            else:
-                print("Analysis failed or was skipped, not saving data.")
-        else:
-            print("State is PAUSED, skipping analysis.")
+        timestamp, validity, future = pending.get()
+        category, description = future.result()
+        storage.append(output_dir, timestamp, CATEGORY_NAMES.index(category), validity, description)
+        log.info("Saved %s: %s (%s)", datetime.fromtimestamp(timestamp).strftime("%H:%M:%S"), category, description)
+        scheduler.on_category(category)
+        chart_dirty.set()
+
 
+def die(args):
+    """Kills the whole process when a worker thread crashes, like the serial loop used to."""
+    threading.__excepthook__(args)
+    os._exit(1)
+# --- End Pipeline Workers ---
 
-        # --- Generate/Update the chart ---
+
+def setup():
+    """Prepares what both the main loop and profile() need: the output directory and a trained classifier."""
+    # Ensure output directory exists
+    os.makedirs(output_dir, exist_ok=True)
+    log.debug("Ensured output directory exists: %s", output_dir)
+
+    # Train the local classifier on everything categorized so far
+    for _, code, description in storage.iter_samples(output_dir):
+        if CATEGORY_NAMES[code] != "Fail":
+            classifier.learn(description, CATEGORY_NAMES[code])
+    log.info("Trained local classifier on %d samples.", classifier.class_counts.total())
+
+
+def profile(cycles, delay_seconds, capture_screenshot):
+    """Runs cycles back to back on this thread under cProfile and dumps the stats to profile_path."""
+    setup()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(cycles):
+        image_bytes = capture_screenshot()
+        category, description = analyze(image_bytes, dhash(image_bytes))
+        storage.append(output_dir, int(time.time()), CATEGORY_NAMES.index(category), int(delay_seconds + validity_slack_seconds), description)
         update_chart()
-        # --- End chart generation ---
+    profiler.disable()
+    profiler.dump_stats(profile_path)
+    log.info("Wrote profile of %d cycles to: %s", cycles, profile_path)
 
 
-        # Wait for the specified delay
-        print(f"Waiting for {delay_seconds} seconds...")
-        for _ in range(delay_seconds):
-            if not is_running and _ > 0:
-                 pass
-            time.sleep(1)
+def main(delay_seconds, capture_screenshot):
+    """Main loop: capture on an adaptive cadence and hand screenshots to the analysis pool."""
+    global query_server, capture_pool, output_pool
+    setup()
+
+    # Register the signal handler
+    signal.signal(signal.SIGUSR1, handle_sigusr1)
+    log.info("Process ID: %d. Send SIGUSR1 to toggle analysis.", os.getpid())
+    log.info("Initial state: %s", "ENABLED" if is_running else "DISABLED")
+
+    metrics.start_trace(trace_path)
+    if query_port is not None:
+        query_server = QueryServer(("127.0.0.1", query_port), output_dir)
+        threading.Thread(target=query_server.serve_forever, kwargs={"poll_interval": None}, daemon=True).start() # No polling, so a paused tracker stays asleep
+        log.info("Query API on http://127.0.0.1:%d", query_server.server_port)
+    scheduler = AdaptiveScheduler(delay_seconds, max_delay_seconds, backoff_factor, on_tighten=wake)
+    threading.excepthook = die
+    capture_pool = ThreadPoolExecutor(max_workers=len(capture_outputs))
+    output_pool = ThreadPoolExecutor(max_workers=max_in_flight * len(capture_outputs))
+    threading.Thread(target=render_worker, daemon=True).start()
+    threading.Thread(target=commit_worker, args=(scheduler,), daemon=True).start()
+
+    last_hashes = None
+    while True:
+        cycle_start = time.monotonic()
+        log.debug("Cycle start. State: %s", "RUNNING" if is_running else "PAUSED")
+
+        if not is_running:
+            log.debug("State is PAUSED, skipping analysis.")
+        elif os.path.exists(idle_flag_path):
+            log.debug("Idle (%s exists), skipping capture.", idle_flag_path)
+        elif not in_flight.acquire(blocking=False):
+            log.warning("%d analyses still in flight, skipping this capture.", max_in_flight)
+        else:
+            timestamp = int(time.time())
+            with metrics.timed("capture"):
+                images = list(capture_pool.map(capture_screenshot, capture_outputs))
+            with metrics.timed("dhash"):
+                screen_hashes = [dhash(image_bytes) for image_bytes in images]
+            # A very different screen anywhere means something new is going on, so look again soon
+            if last_hashes and any((screen_hash ^ last_hash).bit_count() > screen_change_distance
+                                   for screen_hash, last_hash in zip(screen_hashes, last_hashes)):
+                scheduler.tighten()
+            last_hashes = screen_hashes
+            # The sample counts until the next capture is due, plus some slack
+            validity = int(scheduler.delay + validity_slack_seconds)
+            future = analysis_pool.submit(analyze_outputs, images, screen_hashes)
+            future.add_done_callback(lambda _: in_flight.release())
+            pending.put((timestamp, validity, future))
+            log.debug("Queued screenshot for analysis (%d awaiting commit).", pending.qsize())
+
+        # Keep the chart current even without new samples (day rollover, pause)
+        chart_dirty.set()
+        metrics.write_textfile(metrics_path)
+
+        # Wait for the next capture, or without any timeout while paused.
+        # A pause/resume ends the wait right away; a tightened delay just shortens it.
+        log.debug("Waiting %.0f seconds until next capture...", scheduler.delay)
+        was_running = is_running
+        while True:
+            timeout = max(0, cycle_start + scheduler.delay - time.monotonic()) if is_running else None
+            if not select.select([wake_read], [], [], timeout)[0]:
+                break
+            os.read(wake_read, 4096)
+            if is_running != was_running:
+                log.info("SIGUSR1 received. Analysis toggled to: %s", "ENABLED" if is_running else "DISABLED")
+                break
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Periodically capture screen and analyze activity.")
     parser.add_argument("delay", type=int, help="Delay between captures in seconds.")
+    parser.add_argument("--capture", choices=capture.BACKENDS, default=capture_backend, help="Screenshot backend.")
+    parser.add_argument("--outputs", nargs="+", metavar="NAME", help="Capture these outputs separately, e.g. DP-1 HDMI-A-1.")
+    parser.add_argument("--merge-policy", choices=merge.POLICIES, default=merge_policy, help="Which output wins when they disagree.")
+    parser.add_argument("--base-url", default=api_base_url, help="OpenAI-compatible API to use, e.g. mock_llm.py's.")
+    parser.add_argument("--debug", action="store_true", help="Log every sample, segment and LLM exchange.")
+    parser.add_argument("--profile", type=int, metavar="N", help=f"Profile N cycles run back to back, write {profile_path} and exit.")
     args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    api_base_url = args.base_url
+    capture_outputs = args.outputs or capture_outputs
+    merge_policy = args.merge_policy
 
     # Removed check for positive delay
-    main(args.delay)
+    if args.profile:
+        profile(args.profile, args.delay, capture.BACKENDS[args.capture])
+    else:
+        main(args.delay, capture.BACKENDS[args.capture])
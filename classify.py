@@ -0,0 +1,64 @@
+"""Offline naive Bayes categorizer for activity descriptions.
+
+Learns from the description/category pairs already in data/, so most samples
+don't need the second LLM round-trip.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+MIN_SAMPLES = 20 # Below this many samples overall the classifier doesn't answer
+MIN_CLASS_SAMPLES = 3 # Nor for a category it has seen fewer times than this
+
+
+def tokenize(description: str) -> list[str]:
+    """Lowercase words plus word bigrams."""
+    words = re.findall(r"[a-z0-9]+", description.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class Classifier:
+    """Multinomial naive Bayes with add-one smoothing, trainable one sample at a time.
+
+    Every category it may answer with gets scored, seen or not, so one learned
+    category doesn't win everything by default.
+    """
+
+    def __init__(self, categories: list[str]):
+        self.categories = categories
+        self.class_counts = Counter() # category -> samples
+        self.token_counts = defaultdict(Counter) # category -> token -> occurrences
+        self.token_totals = Counter() # category -> total tokens
+        self.vocabulary = set()
+        self.lock = threading.Lock() # Analyses run on several threads at once
+
+    def learn(self, description: str, category: str):
+        """Adds one labelled sample to the model."""
+        tokens = tokenize(description)
+        with self.lock:
+            self.class_counts[category] += 1
+            self.token_counts[category].update(tokens)
+            self.token_totals[category] += len(tokens)
+            self.vocabulary.update(tokens)
+
+    def predict(self, description: str) -> tuple[str, float]:
+        """Returns the most likely category and its posterior probability."""
+        tokens = tokenize(description)
+        with self.lock:
+            total_samples = sum(self.class_counts[category] for category in self.categories)
+            vocabulary_size = len(self.vocabulary) + 1 # Room for unseen tokens, so empty classes still score
+            scores = {}
+            for category in self.categories:
+                counts = self.token_counts[category]
+                denominator = self.token_totals[category] + vocabulary_size
+                # Smoothed prior, so unseen categories keep a share
+                scores[category] = math.log((self.class_counts[category] + 1) / (total_samples + len(self.categories))) + sum(
+                    math.log((counts[token] + 1) / denominator) for token in tokens
+                )
+            best = max(scores, key=scores.get)
+            if total_samples < MIN_SAMPLES or self.class_counts[best] < MIN_CLASS_SAMPLES:
+                return best, 0.0 # Too little to go on, leave it to the LLM
+        # Normalize in log space so long descriptions don't underflow
+        confidence = 1 / sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, confidence
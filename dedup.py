@@ -0,0 +1,66 @@
+"""Perceptual-hash cache so an unchanged screen doesn't cost another LLM round-trip."""
+import io
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+from PIL import Image
+
+log = logging.getLogger(__name__)
+
+
+def dhash(image_bytes: bytes) -> int:
+    """Returns the 64-bit difference hash of an encoded image.
+
+    The image is shrunk to 9x8 grayscale and each bit says whether a pixel is
+    brighter than its right neighbour, so small rendering noise doesn't change it.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    image.draft('L', (18, 16)) # Let the JPEG decoder downscale for us
+    pixels = image.convert('L').resize((9, 8), Image.BILINEAR).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+class ScreenCache:
+    """LRU cache from screen hash to (category, description), with per-day hit/miss counters."""
+
+    def __init__(self, max_distance: int, max_size: int):
+        self.max_distance = max_distance # Hamming distance that still counts as the same screen
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.day = date.today()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock() # Analyses run on several threads at once
+
+    def lookup(self, screen_hash: int) -> tuple[str, str] | None:
+        """Returns the cached analysis of a near-identical screen, or None."""
+        with self.lock:
+            self._roll_day()
+            for cached_hash, result in self.entries.items():
+                if (cached_hash ^ screen_hash).bit_count() <= self.max_distance:
+                    self.entries.move_to_end(cached_hash)
+                    self.hits += 1
+                    return result
+            self.misses += 1
+            return None
+
+    def store(self, screen_hash: int, category: str, description: str):
+        """Remembers an analysis, evicting the least recently used one when full."""
+        with self.lock:
+            self.entries[screen_hash] = (category, description)
+            self.entries.move_to_end(screen_hash)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def _roll_day(self):
+        """Reports yesterday's counters and resets them on the first lookup of a new day."""
+        if date.today() != self.day:
+            log.info("Screen cache for %s: %d hits, %d misses", self.day, self.hits, self.misses)
+            self.day = date.today()
+            self.hits = 0
+            self.misses = 0
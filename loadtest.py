@@ -0,0 +1,111 @@
+"""End-to-end load test: the real tracking loop against mock_llm.py, at accelerated time.
+
+The capture delay, the backoff cap, the validity slack and the mock's latencies
+are all divided by --speedup, so an hour of tracking takes a minute. Cadence is
+reported in tracker seconds (multiplied back up); stage latencies are wall
+clock, as measured.
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date
+from openai import OpenAI
+import capture
+import check
+import metrics
+import mock_llm
+import storage
+from chart import CATEGORY_COLORS, CATEGORY_NAMES, ChartRenderer, DayReader
+
+QUEUE_SAMPLE_SECONDS = 0.01 # How often the queue depth gets sampled (wall clock)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank quantile, like metrics.percentiles."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def report(data_dir: str, speedup: float, capture_times: list[float], queue_depths: list[int]):
+    """Prints achieved cadence, queue depth and per-stage latency percentiles."""
+    intervals = [(b - a) * speedup for a, b in zip(capture_times, capture_times[1:])]
+    samples = storage.read_day(data_dir, date.today())
+    failed = sum(1 for sample in samples if CATEGORY_NAMES[sample[1]] == "Fail")
+    print(f"captures          {len(capture_times)}, {len(samples)} committed, {failed} failed")
+    if intervals:
+        print(f"interval          mean {sum(intervals) / len(intervals):.1f}s, "
+              f"p50 {percentile(intervals, 0.5):.1f}s, p95 {percentile(intervals, 0.95):.1f}s (tracker time)")
+    print(f"awaiting commit   mean {sum(queue_depths) / len(queue_depths):.2f}, "
+          f"p95 {percentile(queue_depths, 0.95)}, max {max(queue_depths)}")
+    for stage in sorted(metrics.windows):
+        quantiles = ", ".join(f"p{round(q * 100)} {seconds * 1000:.1f}ms" for q, seconds in metrics.percentiles(stage).items())
+        print(f"{stage:17} {quantiles} ({metrics.counts[stage]} runs)")
+
+
+def run(duration: float, delay: float, speedup: float, latency: str, median: float, spread: float, error_rate: float, repeat_probability: float, outputs: int):
+    """Runs the tracker on this thread for duration wall-clock seconds, then reports and exits."""
+    data_dir = tempfile.mkdtemp(prefix="track-loadtest-")
+    server = mock_llm.MockLLM(("127.0.0.1", 0), latency, median / speedup, spread, error_rate, mock_llm.RESPONSES)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Point the tracker at the mock and keep it away from the real data and /tmp files
+    check.client = OpenAI(base_url=f"http://127.0.0.1:{server.server_port}/v1", api_key="mock")
+    check.output_dir = data_dir
+    check.day_reader = DayReader(data_dir)
+    check.renderer = ChartRenderer(os.path.join(data_dir, "time.png"), check.chart_width, check.chart_height, CATEGORY_COLORS)
+    check.max_delay_seconds /= speedup
+    check.validity_slack_seconds /= speedup
+    check.idle_flag_path = os.path.join(data_dir, "idle")
+    check.metrics_path = os.path.join(data_dir, "track.prom")
+    check.trace_path = os.path.join(data_dir, "track-trace.jsonl")
+    check.query_port = 0 # Any free port, so it doesn't clash with a running tracker
+
+    check.capture_outputs = [f"fake-{n}" for n in range(outputs)]
+
+    # Synthetic screens that sometimes stay the same, so the screen cache gets used too
+    capture_times = []
+    last_screens = {}
+
+    def fake_capture(output):
+        if output == check.capture_outputs[0]:
+            capture_times.append(time.monotonic())
+        if output not in last_screens or random.random() >= repeat_probability:
+            last_screens[output] = capture.synthetic()
+        return last_screens[output]
+
+    queue_depths = []
+
+    def sample_queue():
+        while True:
+            queue_depths.append(check.pending.qsize())
+            time.sleep(QUEUE_SAMPLE_SECONDS)
+
+    def finish():
+        report(data_dir, speedup, capture_times, queue_depths)
+        print(f"Data, chart and trace left in {data_dir}")
+        os._exit(0)
+
+    threading.Thread(target=sample_queue, daemon=True).start()
+    threading.Timer(duration, finish).start()
+    check.main(delay / speedup, fake_capture) # The signal handler has to be registered on the main thread
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the tracker against a local mock LLM at accelerated time and report how it keeps up.")
+    parser.add_argument("--duration", type=float, default=30, help="Wall-clock seconds to run for.")
+    parser.add_argument("--delay", type=float, default=30, help="Capture delay in tracker seconds.")
+    parser.add_argument("--speedup", type=float, default=60, help="How much faster than real time to run.")
+    parser.add_argument("--latency", choices=mock_llm.LATENCIES, default="lognormal", help="Mock response time distribution.")
+    parser.add_argument("--latency-ms", type=float, default=800, help="Median mock response time in tracker milliseconds.")
+    parser.add_argument("--spread", type=float, default=0.5, help="Spread of the response time distribution.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of screenshot requests that fail.")
+    parser.add_argument("--outputs", type=int, default=1, help="Number of outputs to capture and analyze each cycle.")
+    parser.add_argument("--repeat-probability", type=float, default=0.5, help="Chance that the screen hasn't changed since the last capture.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING) # Dropped captures still show up
+
+    run(args.duration, args.delay, args.speedup, args.latency, args.latency_ms / 1000, args.spread, args.error_rate, args.repeat_probability, args.outputs)
@@ -0,0 +1,80 @@
+"""Reconciling samples from several sources: the outputs of one machine, or the data dirs of several.
+
+Where sources disagree about the same stretch of time, a policy decides:
+  latest   - the newest sample wins
+  priority - the category earliest in PRIORITY wins, then the newest
+Unknown and Fail lose to anything else under both.
+"""
+import heapq
+from datetime import date
+from typing import Iterator
+import storage
+from chart import CATEGORY_NAMES, Timeline
+
+PRIORITY = ["Work", "Reading news", "Watching stuff", "Entertainment", "Other"] # Earlier wins; unlisted categories come last
+POLICIES = ("latest", "priority")
+
+
+def rank(policy: str, category: str) -> int:
+    """Returns how strongly a category claims the time it covers; higher wins."""
+    if category in ("Unknown", "Fail"):
+        return -1
+    if policy == "priority" and category in PRIORITY:
+        return len(PRIORITY) - PRIORITY.index(category)
+    return 0
+
+
+def reconcile(results: list[tuple[str, str]], policy: str) -> tuple[str, str]:
+    """Picks one (category, description) out of simultaneous ones; ties go to the first."""
+    return max(results, key=lambda result: rank(policy, result[0]))
+
+
+def tag(source: Iterator[tuple[int, int, int]], n: int) -> Iterator[tuple[int, int, int, int]]:
+    """Adds the source number to each sample."""
+    for timestamp, code, validity in source:
+        yield timestamp, code, validity, n
+
+
+def merge_sources(sources: list[Iterator[tuple[int, int, int]]], policy: str) -> Iterator[tuple[int, int, int]]:
+    """K-way merges time-ordered (timestamp, code, validity) streams into one.
+
+    Only each source's newest sample is held. When a sample comes in while
+    other sources' samples are still valid, the policy picks which one the
+    merged stream follows; when that one runs out, the best of the rest takes
+    over for what's left of it.
+    """
+    latest = {} # Source -> (timestamp, code, end) of its newest sample
+    current = None # (code, end) the merged stream is following
+
+    def best(now):
+        valid = [(rank(policy, CATEGORY_NAMES[code]), timestamp, code, end)
+                 for timestamp, code, end in latest.values() if end > now]
+        return max(valid)[2:] if valid else None
+
+    def hand_over(until):
+        nonlocal current
+        while current and current[1] < until:
+            successor = best(current[1])
+            if successor is None:
+                return
+            yield current[1], successor[0], successor[1] - current[1]
+            current = successor
+
+    for timestamp, code, validity, n in heapq.merge(*(tag(source, n) for n, source in enumerate(sources))):
+        yield from hand_over(timestamp)
+        latest[n] = (timestamp, code, timestamp + validity)
+        winner = best(timestamp)
+        if winner != current:
+            yield timestamp, winner[0], winner[1] - timestamp
+            current = winner
+    yield from hand_over(float("inf"))
+
+
+def read_merged(data_dirs: list[str], target_date: date, policy: str) -> Timeline:
+    """Streams the day logs of several data dirs into one Timeline."""
+    sources = [((record[0], record[1], record[2]) for record in storage.iter_records(data_dir, target_date))
+               for data_dir in data_dirs]
+    timeline = Timeline()
+    for timestamp, code, validity in merge_sources(sources, policy):
+        timeline.append(timestamp, code, validity)
+    return timeline
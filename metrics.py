@@ -0,0 +1,65 @@
+"""Per-stage latency tracking for the tracking loop.
+
+Every timed stage feeds a rolling window (for p50/p95/p99) and, once
+start_trace() has been called, one JSON line per measurement in the trace file.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+WINDOW = 1000 # Measurements per stage kept for the percentiles
+QUANTILES = (0.5, 0.95, 0.99)
+
+windows = defaultdict(lambda: deque(maxlen=WINDOW)) # stage -> recent durations
+counts = defaultdict(int) # stage -> measurements ever
+sums = defaultdict(float) # stage -> seconds ever
+trace_file = None
+lock = threading.Lock() # Stages run on several threads at once
+
+
+def start_trace(path: str):
+    """Starts appending every measurement to a JSONL trace."""
+    global trace_file
+    trace_file = open(path, "a", buffering=1)
+
+
+def record(stage: str, seconds: float):
+    """Adds one measurement of a stage."""
+    with lock:
+        windows[stage].append(seconds)
+        counts[stage] += 1
+        sums[stage] += seconds
+        if trace_file:
+            trace_file.write(json.dumps({"time": time.time(), "stage": stage, "seconds": seconds}) + "\n")
+
+
+@contextmanager
+def timed(stage: str):
+    """Times the body of a with-block as one measurement of stage."""
+    start = time.perf_counter()
+    yield
+    record(stage, time.perf_counter() - start)
+
+
+def percentiles(stage: str) -> dict[float, float]:
+    """Returns the nearest-rank quantiles over the stage's rolling window."""
+    with lock:
+        durations = sorted(windows[stage])
+    return {q: durations[min(len(durations) - 1, int(q * len(durations)))] for q in QUANTILES}
+
+
+def write_textfile(path: str):
+    """Atomically writes all stages as a Prometheus summary for the node exporter textfile collector."""
+    lines = ["# HELP track_stage_seconds Time spent in each stage of the tracking loop.",
+             "# TYPE track_stage_seconds summary"]
+    for stage in sorted(windows):
+        for q, seconds in percentiles(stage).items():
+            lines.append(f'track_stage_seconds{{stage="{stage}",quantile="{q}"}} {seconds:.6f}')
+        lines.append(f'track_stage_seconds_sum{{stage="{stage}"}} {sums[stage]:.6f}')
+        lines.append(f'track_stage_seconds_count{{stage="{stage}"}} {counts[stage]}')
+    with open(path + ".tmp", "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(path + ".tmp", path)
@@ -0,0 +1,52 @@
+"""One-shot migration from one-text-file-per-sample to the per-day logs in storage.py."""
+import argparse
+import os
+import re
+from datetime import datetime
+import storage
+from chart import CATEGORY_NAMES
+
+LEGACY_VALIDITY_SECONDS = 100 # What the chart assumed for every sample before validity was stored
+
+
+def migrate(data_dir: str):
+    """Appends every YYYYMMDD_HHMMSS.txt in data_dir to its day log and deletes it."""
+    filenames = sorted(f for f in os.listdir(data_dir) if re.fullmatch(r"\d{8}_\d{6}\.txt", f))
+    print(f"Migrating {len(filenames)} samples in {data_dir}...")
+
+    # Day logs must stay in time order, so only append to one that ends before the
+    # day's first pending sample (e.g. left behind by an interrupted migration)
+    timestamps = {filename: int(datetime.strptime(filename.split('.')[0], "%Y%m%d_%H%M%S").timestamp()) for filename in filenames}
+    first_pending = {}
+    for timestamp in timestamps.values(): # Sorted, so the first one seen per day is the earliest
+        first_pending.setdefault(datetime.fromtimestamp(timestamp).date(), timestamp)
+    conflicts = []
+    for day, timestamp in sorted(first_pending.items()):
+        records, _ = storage.read_records(data_dir, day)
+        if records and records[-1][0] > timestamp:
+            conflicts.append(str(day))
+    if conflicts:
+        raise SystemExit(f"Day logs for {', '.join(conflicts)} already have later samples; not migrating into them.")
+
+    for filename in filenames:
+        filepath = os.path.join(data_dir, filename)
+        with open(filepath, 'r') as f:
+            category = f.readline().strip()
+            description = f.read()
+        # The chart always ignored samples with an empty category
+        if category:
+            # Categories that were renamed or removed since get charted as "Other" anyway
+            if category not in CATEGORY_NAMES:
+                category = "Other"
+            storage.append(data_dir, timestamps[filename], CATEGORY_NAMES.index(category), LEGACY_VALIDITY_SECONDS, description)
+        # Only once the sample is safely in its day log
+        os.remove(filepath)
+
+    print("Migration finished.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert per-sample .txt files to per-day logs.")
+    parser.add_argument("data_dir", nargs="?", default="data", help="Data directory to migrate.")
+    args = parser.parse_args()
+    migrate(args.data_dir)
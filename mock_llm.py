@@ -0,0 +1,100 @@
+"""Stand-in for the OpenAI-compatible chat completions API, for running the tracker offline.
+
+Requests with a screenshot get a canned description, categorization requests get
+that description's category. Latency follows a configurable distribution and a
+share of screenshot requests fail the way OpenRouter does (HTTP 200, choices: null).
+"""
+import argparse
+import json
+import logging
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+RESPONSES = {
+    "Writing Python code in a terminal editor.": "Work",
+    "Reading the Python documentation for the threading module.": "Work",
+    "Scrolling through the Hacker News front page.": "Entertainment",
+    "Browsing a Reddit thread about mechanical keyboards.": "Entertainment",
+    "Watching a YouTube video about woodworking.": "Watching stuff",
+    "Reading an article in The Economist about interest rates.": "Reading news",
+    "Looking at the desktop with no windows open.": "Other",
+}
+
+LATENCIES = {
+    "fixed": lambda median, spread: median,
+    "uniform": lambda median, spread: random.uniform(median * (1 - spread), median * (1 + spread)),
+    "lognormal": lambda median, spread: random.lognormvariate(0, spread) * median,
+}
+
+
+class MockLLM(ThreadingHTTPServer):
+    """Serves /chat/completions on its own thread per request, like a real backend."""
+    daemon_threads = True
+
+    def __init__(self, address, latency: str, median: float, spread: float, error_rate: float, responses: dict[str, str]):
+        super().__init__(address, Handler)
+        self.latency = LATENCIES[latency]
+        self.median = median
+        self.spread = spread
+        self.error_rate = error_rate
+        self.responses = responses
+
+    def complete(self, messages: list[dict]) -> dict:
+        """Builds the response body for one chat completion request."""
+        time.sleep(self.latency(self.median, self.spread))
+        content = messages[0]["content"]
+        if isinstance(content, list): # Text plus screenshot: describe it
+            if random.random() < self.error_rate:
+                return {"choices": None, "error": {"code": 502, "message": "Provider returned error"}}
+            text = random.choice(list(self.responses))
+        else: # Categorize the description quoted in the prompt
+            match = re.search(r'activity description: "(.*)"', content)
+            text = self.responses.get(match and match.group(1), "Other")
+        return {
+            "id": "mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "mock",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+        }
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        body = json.dumps(self.server.complete(request["messages"])).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug(format, *args)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI-compatible chat completions API.")
+    parser.add_argument("--port", type=int, default=8099, help="Port to listen on (localhost only).")
+    parser.add_argument("--latency", choices=LATENCIES, default="lognormal", help="Response time distribution.")
+    parser.add_argument("--latency-ms", type=float, default=800, help="Median response time in milliseconds.")
+    parser.add_argument("--spread", type=float, default=0.5, help="Spread of the distribution (sigma for lognormal, +- fraction for uniform).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of screenshot requests that fail.")
+    parser.add_argument("--responses", help="JSON file mapping canned descriptions to categories.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    responses = RESPONSES
+    if args.responses:
+        with open(args.responses) as f:
+            responses = json.load(f)
+    server = MockLLM(("127.0.0.1", args.port), args.latency, args.latency_ms / 1000, args.spread, args.error_rate, responses)
+    log.info("Mock LLM listening on http://127.0.0.1:%d/v1", args.port)
+    server.serve_forever()
@@ -0,0 +1,49 @@
+"""Shrinks screenshots before they're sent to the LLM, which pays per byte in latency and tokens.
+
+fit() sends the capture as-is when it's already small enough, and otherwise
+walks down LADDER (scale relative to the capture, JPEG quality) until the
+re-encoded image fits the byte budget. Busy screens full of small text end up
+smaller and blurrier; mostly empty ones keep their full resolution.
+"""
+import io
+from PIL import Image
+
+LADDER = ((1.0, 70), (0.75, 70), (0.75, 50), (0.5, 50), (0.5, 30)) # Best first; the last step is used regardless of size
+
+
+def scaled(image: Image.Image, scale: float) -> Image.Image:
+    """Returns the decoded image resized by scale."""
+    if scale == 1:
+        return image
+    return image.resize((round(image.width * scale), round(image.height * scale)), Image.BILINEAR)
+
+
+def encode(image: Image.Image, quality: int) -> bytes:
+    """Encodes an image as JPEG at quality."""
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def reencode(image_bytes: bytes, scale: float, quality: int) -> bytes:
+    """Returns the image scaled by scale and re-encoded as JPEG at quality."""
+    image = Image.open(io.BytesIO(image_bytes))
+    size = (round(image.width * scale), round(image.height * scale))
+    image.draft('RGB', size) # Let the JPEG decoder downscale for us where it can
+    image = image.convert('RGB')
+    return encode(image if image.size == size else image.resize(size, Image.BILINEAR), quality)
+
+
+def fit(image_bytes: bytes, max_bytes: int) -> bytes:
+    """Returns the best-looking version of the image that is at most max_bytes (or the smallest one tried)."""
+    if len(image_bytes) <= max_bytes:
+        return image_bytes
+    image = Image.open(io.BytesIO(image_bytes)).convert('RGB') # Decoded once, resized once per scale
+    resized = {}
+    for scale, quality in LADDER:
+        if scale not in resized:
+            resized[scale] = scaled(image, scale)
+        payload = encode(resized[scale], quality)
+        if len(payload) <= max_bytes:
+            break
+    return payload
@@ -0,0 +1,79 @@
+"""Offline benchmark of screenshot payload settings: bytes sent, LLM latency and categorization agreement.
+
+The corpus is a directory with one subdirectory per category, named like the
+keys of CATEGORY_COLORS, holding screenshots (JPEG or PNG) of that activity:
+
+  corpus/Work/editor.jpg
+  corpus/Watching stuff/youtube.png
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI
+import payload
+from check import API_BASE_URL, API_KEY_FILE, categorize, describe, load_api_key
+
+BUDGETS = (50_000, 100_000, 150_000, 300_000) # Byte budgets to try fit() with
+
+
+def load_corpus(corpus_dir: str) -> list[tuple[str, bytes]]:
+    """Returns (category, image bytes) for every screenshot in the corpus."""
+    corpus = []
+    for category in sorted(os.listdir(corpus_dir)):
+        for filename in sorted(os.listdir(os.path.join(corpus_dir, category))):
+            with open(os.path.join(corpus_dir, category, filename), "rb") as f:
+                corpus.append((category, f.read()))
+    return corpus
+
+
+def settings(budgets) -> dict:
+    """Returns name -> function from screenshot bytes to payload bytes."""
+    candidates = {"as captured": lambda image_bytes: image_bytes}
+    for scale, quality in payload.LADDER:
+        candidates[f"scale {scale} q{quality}"] = lambda image_bytes, scale=scale, quality=quality: payload.reencode(image_bytes, scale, quality)
+    for budget in budgets:
+        candidates[f"fit {budget // 1000}k"] = lambda image_bytes, budget=budget: payload.fit(image_bytes, budget)
+    return candidates
+
+
+def run(client: OpenAI, corpus: list[tuple[str, bytes]], candidates: dict, workers: int) -> list[dict]:
+    """Sends the whole corpus through describe and categorize once per setting."""
+
+    def analyze(prepare, label, image_bytes):
+        payload_bytes = prepare(image_bytes)
+        start = time.perf_counter()
+        description = describe(client, payload_bytes)
+        category = "Fail" if description is None else categorize(client, description)
+        return len(payload_bytes), time.perf_counter() - start, category == label
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for name, prepare in candidates.items():
+            outcomes = list(pool.map(lambda sample: analyze(prepare, *sample), corpus))
+            latencies = sorted(latency for _, latency, _ in outcomes)
+            results.append({
+                "setting": name,
+                "mean_bytes": sum(size for size, _, _ in outcomes) / len(outcomes),
+                "p50_seconds": latencies[len(latencies) // 2],
+                "p95_seconds": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+                "agreement": sum(agrees for _, _, agrees in outcomes) / len(outcomes),
+            })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare screenshot payload settings on a labelled corpus.")
+    parser.add_argument("corpus", help="Directory with one subdirectory of screenshots per category.")
+    parser.add_argument("--budgets", type=int, nargs="+", default=BUDGETS, help="Byte budgets to try payload.fit() with.")
+    parser.add_argument("--workers", type=int, default=4, help="Screenshots analyzed at once.")
+    parser.add_argument("--base-url", default=API_BASE_URL, help="OpenAI-compatible API to use, e.g. mock_llm.py's.")
+    args = parser.parse_args()
+
+    client = OpenAI(base_url=args.base_url, api_key=load_api_key(API_KEY_FILE))
+    corpus = load_corpus(args.corpus)
+    print(f"{len(corpus)} screenshots")
+    print(f"{'setting':20} {'bytes':>9} {'p50':>7} {'p95':>7} {'agree':>6}")
+    for result in run(client, corpus, settings(args.budgets), args.workers):
+        print(f"{result['setting']:20} {result['mean_bytes']:9.0f} {result['p50_seconds']:6.2f}s "
+              f"{result['p95_seconds']:6.2f}s {result['agreement']:6.0%}")
@@ -0,0 +1,133 @@
+"""Local HTTP API for status bars, so they don't have to read /tmp/time.png.
+
+  /current                              category of the latest sample still valid
+  /totals?start=YYYY-MM-DD&end=...      seconds per category over a range of days
+  /chart.png?width=W&height=H&date=...  the chart at any size
+
+Runs inside the tracker, which publishes today's timeline after every render.
+Totals and charts are cached until the next publish that brings new samples.
+"""
+import io
+import json
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import rollup
+from chart import CATEGORY_COLORS, CATEGORY_NAMES, ChartRenderer, Timeline, read_data
+
+log = logging.getLogger(__name__)
+
+MAX_RENDERERS = 4 # Chart sizes kept set up; a status bar or two only ever asks for a few
+MAX_WIDTH = 8000
+MAX_HEIGHT = 2000
+
+
+class QueryServer(ThreadingHTTPServer):
+    """Answers queries from the last published timeline, one at a time."""
+    daemon_threads = True
+
+    def __init__(self, address, data_dir: str):
+        super().__init__(address, Handler)
+        self.data_dir = data_dir
+        self.lock = threading.Lock() # Queries come in on their own threads; renderers aren't thread safe
+        self.date = None
+        self.timeline = Timeline()
+        self.is_active = True
+        self.version = None # What the cache was built from: (date, samples, active)
+        self.cache = {} # Request path -> (content type, body)
+        self.renderers = {} # (width, height) -> ChartRenderer, kept for their per-day setup, oldest first
+
+    def publish(self, target_date: date, timeline: Timeline, is_active: bool):
+        """Takes a copy of the tracker's current timeline, dropping the cache if anything changed."""
+        version = (target_date, len(timeline), is_active)
+        with self.lock:
+            if version == self.version:
+                return
+            self.date = target_date
+            self.timeline = Timeline(timeline.times, timeline.codes, timeline.validities)
+            self.is_active = is_active
+            self.version = version
+            self.cache.clear()
+
+    def current(self) -> dict:
+        """Returns the category of the latest sample if it's still valid, else Unknown."""
+        category, since = "Unknown", None
+        if len(self.timeline) and self.timeline.times[-1] + self.timeline.validities[-1] > time.time():
+            category, since = CATEGORY_NAMES[self.timeline.codes[-1]], self.timeline.times[-1]
+        return {"category": category, "since": since, "active": self.is_active}
+
+    def totals(self, start_day: date, end_day: date) -> dict[str, int]:
+        """Returns seconds per category from start_day to end_day (inclusive)."""
+        totals = {}
+        for n in range((end_day - start_day).days + 1):
+            day = start_day + timedelta(days=n)
+            # Today from memory, other days from their rollups
+            summary = rollup.summarize(self.timeline, day) if day == self.date else rollup.load(self.data_dir, day)
+            for category, seconds in summary["seconds"].items():
+                totals[category] = totals.get(category, 0) + seconds
+        return totals
+
+    def chart(self, width: int, height: int, target_date: date) -> bytes:
+        """Renders the chart for a day at the given size as a PNG."""
+        if not (0 < width <= MAX_WIDTH and 0 < height <= MAX_HEIGHT):
+            raise ValueError(f"chart size {width}x{height} out of range")
+        renderer = self.renderers.pop((width, height), None) or ChartRenderer(None, width, height, CATEGORY_COLORS)
+        self.renderers[width, height] = renderer # Most recently used last
+        if len(self.renderers) > MAX_RENDERERS:
+            del self.renderers[next(iter(self.renderers))]
+        if target_date == self.date:
+            renderer.render(self.timeline, target_date, self.is_active)
+        else:
+            renderer.render(read_data(self.data_dir, target_date), target_date, True)
+        buffer = io.BytesIO()
+        renderer.image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def respond(self, path: str) -> tuple[str, bytes] | None:
+        """Returns (content type, body) for a request path, or None if there's no such endpoint.
+
+        Raises ValueError for bad parameters.
+        """
+        url = urlsplit(path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        today = self.date or date.today()
+        with self.lock:
+            if url.path == "/current": # Cheap, and goes stale with time rather than with new samples
+                return "application/json", json.dumps(self.current()).encode()
+            if path in self.cache:
+                return self.cache[path]
+            if url.path == "/totals":
+                start_day = date.fromisoformat(params.get("start", today.isoformat()))
+                end_day = date.fromisoformat(params.get("end", start_day.isoformat()))
+                response = "application/json", json.dumps(self.totals(start_day, end_day)).encode()
+            elif url.path == "/chart.png":
+                target_date = date.fromisoformat(params.get("date", today.isoformat()))
+                response = "image/png", self.chart(int(params.get("width", 1000)), int(params.get("height", 44)), target_date)
+            else:
+                return None
+            self.cache[path] = response
+            return response
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        try:
+            response = self.server.respond(self.path)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        if response is None:
+            self.send_error(404)
+            return
+        content_type, body = response
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug(format, *args)
@@ -0,0 +1,64 @@
+"""Multi-day report: one chart row per day plus time per category over the whole range."""
+import argparse
+import logging
+from datetime import date, timedelta
+from PIL import Image, ImageDraw, ImageFont
+import rollup
+from chart import CATEGORY_COLORS, chart_window, hour_ticks, rasterize
+
+log = logging.getLogger(__name__)
+
+
+def format_seconds(seconds: int) -> str:
+    """Formats seconds like the chart does: 3h 25m."""
+    return f"{seconds // 3600}h {seconds // 60 % 60}m"
+
+
+def generate_report(data_dir: str, output_path: str, start_day: date, end_day: date, chart_width: int, row_height: int) -> dict[str, int]:
+    """Renders one row per day from start_day to end_day (inclusive) and returns seconds per category."""
+    days = [start_day + timedelta(days=n) for n in range((end_day - start_day).days + 1)]
+    totals = {}
+    rows = []
+    for day in days:
+        summary = rollup.load(data_dir, day)
+        for category, seconds in summary["seconds"].items():
+            totals[category] = totals.get(category, 0) + seconds
+        chart_start, chart_end = chart_window(day)
+        row, _ = rasterize(summary["segments"], chart_start, (chart_end - chart_start) / chart_width, chart_width)
+        rows.append(row * row_height)
+
+    # Palette-map every day's per-pixel codes into the image in one go
+    image = Image.frombuffer('P', (chart_width, row_height * len(days)), b"".join(rows), 'raw', 'P', 0, 1)
+    image.putpalette([channel for color, _ in CATEGORY_COLORS.values() for channel in color])
+    image = image.convert('RGB')
+    draw = ImageDraw.Draw(image)
+
+    # Hour ticks across all rows, then a separator and a date label per row
+    chart_start, chart_end = chart_window(start_day)
+    for tick_x, tick_width in hour_ticks((chart_end - chart_start) / chart_width):
+        draw.line([(tick_x, 0), (tick_x, image.height)], fill=(255, 255, 255), width=tick_width)
+    font = ImageFont.load_default()
+    for n, day in enumerate(days):
+        draw.line([(0, n * row_height), (chart_width - 1, n * row_height)], fill=(64, 64, 64))
+        draw.text((4, n * row_height + 2), day.strftime("%a %d %b"), fill=(255, 255, 255), font=font)
+
+    image.save(output_path)
+    log.info("Report for %s to %s saved to %s", start_day, end_day, output_path)
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render a multi-day report and print time per category.")
+    parser.add_argument("start", type=date.fromisoformat, nargs="?", default=date.today() - timedelta(days=6), help="First day, YYYY-MM-DD (default: a week ago).")
+    parser.add_argument("end", type=date.fromisoformat, nargs="?", default=date.today(), help="Last day, YYYY-MM-DD (default: today).")
+    parser.add_argument("--data-dir", default="data", help="Data directory.")
+    parser.add_argument("--output", default="/tmp/report.png", help="Where to save the report image.")
+    parser.add_argument("--width", type=int, default=1000, help="Chart width in pixels.")
+    parser.add_argument("--row-height", type=int, default=20, help="Height of each day's row in pixels.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    totals = generate_report(args.data_dir, args.output, args.start, args.end, args.width, args.row_height)
+    for category in CATEGORY_COLORS:
+        if category in totals:
+            print(f"{category:16} {format_seconds(totals[category])}")
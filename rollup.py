@@ -0,0 +1,58 @@
+"""Per-day summaries (merged segments and seconds per category) for reports.
+
+Days are cached as data/YYYYMMDD.rollup, so a report over a year reads 365
+small files instead of every sample. The tracker rewrites today's rollup
+whenever its segments change; any rollup older than its day log (e.g. after
+a backfill) is recomputed.
+"""
+import json
+import os
+from datetime import date
+import storage
+from chart import CATEGORY_NAMES, Timeline, chart_window, merge_segments, read_data
+
+
+def summarize(timeline: Timeline, day: date) -> dict:
+    """Merges a day's samples into chart segments and summarizes them."""
+    chart_start, chart_end = chart_window(day)
+    timeline = timeline.between(chart_start, chart_end)
+    return from_segments(merge_segments(timeline.times, timeline.codes, timeline.validities,
+                                        chart_start, chart_end, CATEGORY_NAMES.index("Unknown")))
+
+
+def from_segments(segments: list[tuple[int, int, int]]) -> dict:
+    """Builds a rollup from a day's chart segments, totalling seconds per category."""
+    seconds = {}
+    for start, end, code in segments:
+        if CATEGORY_NAMES[code] != "Unknown":
+            seconds[CATEGORY_NAMES[code]] = seconds.get(CATEGORY_NAMES[code], 0) + end - start
+    return {"segments": segments, "seconds": seconds}
+
+
+def rollup_path(data_dir: str, day: date) -> str:
+    """Returns the rollup cache file for a day."""
+    return os.path.join(data_dir, day.strftime("%Y%m%d") + ".rollup")
+
+
+def save(data_dir: str, day: date, summary: dict):
+    """Writes a day's rollup atomically."""
+    path = rollup_path(data_dir, day)
+    with open(path + ".tmp", "w") as f:
+        json.dump(summary, f)
+    os.replace(path + ".tmp", path)
+
+
+def load(data_dir: str, day: date) -> dict:
+    """Returns a day's rollup, from the cache when it's still current."""
+    log_path, _ = storage.day_paths(data_dir, day)
+    path = rollup_path(data_dir, day)
+    if not os.path.exists(log_path):
+        return summarize(Timeline(), day)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(log_path):
+        with open(path) as f:
+            summary = json.load(f)
+        summary["segments"] = [tuple(segment) for segment in summary["segments"]]
+        return summary
+    summary = summarize(read_data(data_dir, day), day)
+    save(data_dir, day, summary)
+    return summary
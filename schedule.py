@@ -0,0 +1,28 @@
+"""Adaptive capture interval: sample less while the activity stays the same."""
+from typing import Callable
+
+
+class AdaptiveScheduler:
+    """Backs the delay off while consecutive samples agree and snaps back on any change."""
+
+    def __init__(self, base_delay: float, max_delay: float, backoff_factor: float, on_tighten: Callable[[], None]):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.backoff_factor = backoff_factor
+        self.delay = base_delay
+        self.last_category = None
+        self.on_tighten = on_tighten # Called when the delay drops, so the main loop can reschedule
+
+    def on_category(self, category: str):
+        """Updates the delay from a newly committed sample."""
+        if category == self.last_category:
+            self.delay = min(self.delay * self.backoff_factor, self.max_delay)
+        else:
+            self.tighten()
+        self.last_category = category
+
+    def tighten(self):
+        """Goes back to the base delay, e.g. after a category change or a big screen change."""
+        if self.delay != self.base_delay:
+            self.delay = self.base_delay
+            self.on_tighten()
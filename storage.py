@@ -0,0 +1,105 @@
+"""Append-only per-day sample log.
+
+Each day gets two files in the data directory:
+  YYYYMMDD.log  - fixed-width records: epoch seconds, category code,
+                  validity seconds, description offset, description length
+  YYYYMMDD.desc - the descriptions, back to back, as UTF-8
+
+Category codes are indices into chart.CATEGORY_NAMES, so new categories must
+be added at the end of CATEGORY_COLORS. Validity is how long the sample
+counts for on the chart, since the capture interval varies.
+"""
+import os
+import struct
+from datetime import date, datetime
+from typing import Iterator
+
+RECORD = struct.Struct("<iBHII")
+CODE_OFFSET = 4 # Byte offset of the category code within a record
+
+
+def day_paths(data_dir: str, day: date) -> tuple[str, str]:
+    """Returns the (log, description) file paths for a day."""
+    base = os.path.join(data_dir, day.strftime("%Y%m%d"))
+    return base + ".log", base + ".desc"
+
+
+def append(data_dir: str, timestamp: int, code: int, validity: int, description: str):
+    """Appends one sample to its day's log."""
+    log_path, desc_path = day_paths(data_dir, date.fromtimestamp(timestamp))
+    blob = description.encode()
+    # Description goes first so a record never points past the end of the blob
+    with open(desc_path, "ab") as f:
+        offset = f.tell()
+        f.write(blob)
+    with open(log_path, "ab") as f:
+        f.write(RECORD.pack(timestamp, code, validity, offset, len(blob)))
+
+
+def read_records(data_dir: str, day: date, start: int = 0) -> tuple[list[tuple[int, int, int, int, int]], int]:
+    """Reads the day's records from byte offset start with one sequential read.
+
+    Returns the records and the offset to resume from next time.
+    """
+    log_path, _ = day_paths(data_dir, day)
+    if not os.path.exists(log_path):
+        return [], start
+    with open(log_path, "rb") as f:
+        f.seek(start)
+        buf = f.read()
+    # Leave a record that is still being written for the next read
+    end = len(buf) - len(buf) % RECORD.size
+    return list(RECORD.iter_unpack(buf[:end])), start + end
+
+
+def iter_records(data_dir: str, day: date, chunk_records: int = 4096) -> Iterator[tuple[int, int, int, int, int]]:
+    """Yields the day's records in order, reading the log chunk_records at a time."""
+    log_path, _ = day_paths(data_dir, day)
+    if not os.path.exists(log_path):
+        return
+    with open(log_path, "rb") as f:
+        while chunk := f.read(RECORD.size * chunk_records):
+            # A record still being written only ever shows up at the very end
+            yield from RECORD.iter_unpack(chunk[:len(chunk) - len(chunk) % RECORD.size])
+
+
+def read_description(data_dir: str, day: date, offset: int, length: int) -> str:
+    """Reads one description from the day's blob."""
+    _, desc_path = day_paths(data_dir, day)
+    with open(desc_path, "rb") as f:
+        f.seek(offset)
+        return f.read(length).decode()
+
+
+def read_day(data_dir: str, day: date) -> list[tuple[int, int, int, str]]:
+    """Returns (timestamp, code, validity, description) for every sample of a day."""
+    records, _ = read_records(data_dir, day)
+    if not records:
+        return [] # No log (yet), and so maybe no description blob either
+    _, desc_path = day_paths(data_dir, day)
+    with open(desc_path, "rb") as f:
+        blob = f.read()
+    return [(timestamp, code, validity, blob[offset:offset + length].decode())
+            for timestamp, code, validity, offset, length in records]
+
+
+def list_days(data_dir: str) -> list[date]:
+    """Returns every day that has a log, oldest first."""
+    return [datetime.strptime(filename[:8], "%Y%m%d").date()
+            for filename in sorted(os.listdir(data_dir)) if filename.endswith(".log")]
+
+
+def iter_samples(data_dir: str) -> Iterator[tuple[int, int, str]]:
+    """Yields (timestamp, code, description) for every stored sample, oldest day first."""
+    for day in list_days(data_dir):
+        for timestamp, code, _, description in read_day(data_dir, day):
+            yield timestamp, code, description
+
+
+def rewrite_categories(data_dir: str, day: date, codes: dict[int, int]):
+    """Overwrites the category code of the day's records at the given indices, in place."""
+    log_path, _ = day_paths(data_dir, day)
+    with open(log_path, "r+b") as f:
+        for index, code in codes.items():
+            f.seek(index * RECORD.size + CODE_OFFSET)
+            f.write(bytes((code,)))
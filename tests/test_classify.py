@@ -0,0 +1,28 @@
+from classify import MIN_SAMPLES, Classifier
+
+CATEGORIES = ["Work", "Entertainment", "Watching stuff", "Reading news", "Other"]
+
+
+def test_cold_start_defers_to_llm():
+    classifier = Classifier(CATEGORIES)
+    classifier.learn("Writing Python code in a terminal editor.", "Work")
+    _, confidence = classifier.predict("Watching a YouTube video about woodworking.")
+    assert confidence == 0.0
+
+
+def test_single_learned_category_does_not_win_everything():
+    classifier = Classifier(CATEGORIES)
+    for _ in range(MIN_SAMPLES):
+        classifier.learn("Writing Python code in a terminal editor.", "Work")
+    category, confidence = classifier.predict("Watching a YouTube video about woodworking.")
+    assert category != "Work" or confidence < 0.9
+
+
+def test_confident_once_trained():
+    classifier = Classifier(CATEGORIES)
+    for _ in range(MIN_SAMPLES):
+        classifier.learn("Writing Python code in a terminal editor.", "Work")
+        classifier.learn("Watching a YouTube video about woodworking.", "Watching stuff")
+    category, confidence = classifier.predict("Writing Python code in a terminal editor.")
+    assert category == "Work"
+    assert confidence >= 0.9